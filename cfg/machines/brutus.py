@@ -48,6 +48,9 @@ performance = 1
 # scratch path
 scratch = '/cluster/scratch_xp/public/sukysj/pymlmc'
 
+# worker processes for post-processing (loading results) on the submission node
+workers = 4
+
 # ensemble support
 ensembles = 0
 
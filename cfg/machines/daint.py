@@ -47,6 +47,9 @@ performance = 1
 # scratch path
 scratch = '/scratch/daint/sukysj/pymlmc'
 
+# worker processes for post-processing (loading results) on the submission node
+workers = 4
+
 # ensemble support
 ensembles = 1
 
@@ -44,6 +44,9 @@ bandwidth = 0.0 # GB/s
 #scratch = None
 scratch = '/gpfs/scratch/userexternal/jsukys00/pymlmc'
 
+# worker processes for post-processing (loading results) on the submission node
+workers = 4
+
 # ensemble support
 ensembles = 0
 
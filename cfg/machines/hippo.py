@@ -42,6 +42,9 @@ performance = 1
 # scratch path
 scratch = None
 
+# worker processes for post-processing (loading results) on the submission node
+workers = 4
+
 # ensemble support
 ensembles = 0
 
@@ -47,6 +47,9 @@ performance = 1
 # scratch path (not required - we use $WORK)
 scratch = None
 
+# worker processes for post-processing (loading results) on the submission node
+workers = 4
+
 # ensemble support
 ensembles = 0
 
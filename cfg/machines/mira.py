@@ -50,6 +50,9 @@ performance = 1
 # scratch path
 scratch = '/projects/CloudPredict/sukysj/pymlmc'
 
+# worker processes for post-processing (loading results) on the submission node
+workers = 4
+
 # ensemble support
 ensembles = 1
 
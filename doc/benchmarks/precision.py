@@ -0,0 +1,100 @@
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+# Memory savings and accuracy of reduced-precision (float32) storage
+# of loaded results, compared to the default float64 storage
+#
+# usage: python precision.py [samples] [elements]
+#
+# Jonas Sukys
+# CSE Lab, ETH Zurich, Switzerland
+# sukys.jonas@gmail.com
+# All rights reserved.
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+
+import os, sys
+import numpy
+
+root = os.path.join ( os.path.dirname (os.path.abspath (__file__)), '..', '..', 'src' )
+for directory in [ '', 'lib', 'stats', 'dataclass' ]:
+  sys.path.append ( os.path.join (root, directory) )
+
+from dataclass_series import Series
+from stats import evaluate
+from stats_mean import Mean
+from stats_deviation import Deviation
+from stats_percentile import Percentile
+from stats_numpy import NumPy_Stat
+
+samples  = int (sys.argv [1]) if len (sys.argv) > 1 else 200
+elements = int (sys.argv [2]) if len (sys.argv) > 2 else 10000
+
+# === generate an ensemble of (time series) results: a common signal with large offset and lognormal fluctuations
+
+numpy.random.seed (0)
+signal = 1e3 + numpy.sin ( numpy.linspace (0, 10, elements) )
+values = [ signal + numpy.random.lognormal ( sigma = 0.5, size = elements ) for sample in range (samples) ]
+
+def ensemble (dtype):
+
+  results = []
+  for sample in range (samples):
+    result = Series (qois = ['q'], dtype = dtype)
+    result.meta = { 't' : numpy.arange (elements) }
+    result.data = { 'q' : numpy.array ( values [sample], dtype = dtype if dtype != None else float ) }
+    result.qois = [ 'q' ]
+    results.append (result)
+
+  return results
+
+def assemble (results):
+
+  stats = [ Mean (), Deviation (), Percentile ( [50, 95] ), NumPy_Stat ('median') ]
+
+  # suppress progress output
+  stdout = sys.stdout
+  sys.stdout = open (os.devnull, 'w')
+  try:
+    evaluate (stats, results)
+  finally:
+    sys.stdout.close ()
+    sys.stdout = stdout
+
+  return stats
+
+print
+print ' :: BENCHMARK: %d samples, %d elements' % (samples, elements)
+
+reference = ensemble (None)
+reduced   = ensemble (numpy.float32)
+
+# === memory of the loaded results
+
+memory = lambda results : sum ( [ result.data ['q'] .nbytes for result in results ] )
+
+print
+print '  : %-30s %12.1f MB' % ( 'MEMORY (float64)', memory (reference) / 1e6 )
+print '  : %-30s %12.1f MB' % ( 'MEMORY (float32)', memory (reduced) / 1e6 )
+print '  : %-30s %12.1fx' % ( 'SAVINGS', memory (reference) / float ( memory (reduced) ) )
+
+# === accuracy of the statistics (relative to the float64 deviation of the ensemble)
+
+exact = assemble (reference)
+approximate = assemble (reduced)
+scale = numpy.abs ( exact [1] .estimate ['q'] ) .max ()
+
+print
+print '  : %-30s %12s %12s' % ('STATISTIC', 'MAX. DELTA', 'RELATIVE')
+
+for stat, other in zip (exact, approximate):
+  delta = numpy.nanmax ( numpy.abs ( numpy.asarray (stat.estimate ['q'], dtype=float) - numpy.asarray (other.estimate ['q'], dtype=float) ) )
+  print '  : %-30s %12.2e %12.2e' % ( stat.name, delta, delta / scale )
+
+# the online percentile (P-square) is an approximation itself: its discrete marker adjustments depend on the order
+# of the values, hence its delta is to be compared with its own error w.r.t. the exact percentiles (in float64),
+# reported for each of the percentiles included in its delta above
+percentiles = exact [2] .percentiles
+references  = numpy.percentile ( numpy.array (values), percentiles, axis=0 )
+for column, percentile in enumerate (percentiles):
+  delta = numpy.nanmax ( numpy.abs ( exact [2] .estimate ['q'] [:, column] - references [column] ) )
+  print '  : %-30s %12.2e %12.2e' % ( 'P-square error (%g%%, float64)' % percentile, delta, delta / scale )
+
+print
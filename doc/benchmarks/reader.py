@@ -0,0 +1,80 @@
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+# Benchmark of the fast text file reader ('src/lib/textfile.py')
+# against numpy.genfromtxt on realistic 'statistics.dat' files
+#
+# usage: python reader.py [rows] [columns]
+#
+# Jonas Sukys
+# CSE Lab, ETH Zurich, Switzerland
+# sukys.jonas@gmail.com
+# All rights reserved.
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+
+import os, sys, time, tempfile
+import numpy
+
+sys.path.append ( os.path.join ( os.path.dirname (os.path.abspath (__file__)), '..', '..', 'src', 'lib' ) )
+import textfile
+
+rows    = int (sys.argv [1]) if len (sys.argv) > 1 else 100000
+columns = int (sys.argv [2]) if len (sys.argv) > 2 else 20
+repeats = 3
+
+# === generate a realistic output file: step and time followed by the qois in scientific notation
+
+names = [ 'step', 't' ] + [ 'qoi%d' % column for column in range (columns - 2) ]
+
+path = os.path.join ( tempfile.mkdtemp (), 'statistics.dat' )
+
+steps  = numpy.arange (rows)
+times  = numpy.cumsum ( numpy.random.uniform (1e-5, 2e-5, rows) )
+values = numpy.random.lognormal ( size = (rows, columns - 2) )
+
+with open (path, 'w') as f:
+  f.write ( ' '.join (names) + '\n' )
+  for row in xrange (rows):
+    f.write ( '%d %e ' % (steps [row], times [row]) + ' '.join ( [ '%e' % value for value in values [row] ] ) + '\n' )
+
+print
+print ' :: BENCHMARK: %d rows, %d columns (%.1f MB)' % ( rows, columns, os.path.getsize (path) / 1e6 )
+
+# === readers
+
+def genfromtxt (usecols=None):
+  with open (path, 'r') as f:
+    data = numpy.genfromtxt ( f, names = True, usecols = usecols, delimiter = ' ', dtype = None )
+  return dict ( (key, data [key]) for key in data.dtype.names )
+
+def fast (usecols=None):
+  return textfile.records ( path, usecols )
+
+# === timings (best of several repeats)
+
+def timing (reader, usecols):
+  best = float ('inf')
+  for repeat in range (repeats):
+    start = time.time ()
+    records = reader (usecols)
+    best = min ( best, time.time () - start )
+  return best, records
+
+print
+print '  : %-30s %12s %12s %10s' % ('COLUMNS', 'GENFROMTXT', 'TEXTFILE', 'SPEEDUP')
+
+for label, usecols in [ ('all', None), ('step, t and one qoi', ['step', 't', 'qoi0']) ]:
+
+  slow_time, slow = timing (genfromtxt, usecols)
+  fast_time, quick = timing (fast, usecols)
+
+  # check that both readers produce the same results
+  for key in slow.keys ():
+    if not numpy.allclose ( slow [key], quick [key] ):
+      print ' :: ERROR: results differ for column \'%s\'' % key
+      sys.exit (1)
+
+  print '  : %-30s %11.3fs %11.3fs %9.1fx' % ( label, slow_time, fast_time, slow_time / fast_time )
+
+print
+
+os.remove (path)
+os.rmdir (os.path.dirname (path))
@@ -117,10 +117,12 @@ if __name__ == '__main__':
   from stats_confidence import Confidence
   from stats_deviations import Deviations
   from stats_histogram import Histogram
+  from stats_bootstrap import Bootstrap
   figures = {}
   figures ['median-confidence'] = [ NumPy_Stat ('median'), Confidence (level=0.25), Confidence (level=0.05) ]
   figures ['mean-deviations']   = [ NumPy_Stat ('mean'), Deviations (factor=1), Deviations (factor=2) ]
   figures ['histogram']         = [ Histogram () ]
+  figures ['mean-bootstrap']    = [ NumPy_Stat ('mean'), Bootstrap ('mean') ]
 
   # assemble and plot all statistics
   for suffix, stats in figures.iteritems():
@@ -13,6 +13,7 @@
 
 import os
 import sys
+import numpy
 
 # === local imports
 
@@ -52,6 +53,9 @@ class Config (object):
   inference       = 'diffs'
   enforce         = 0
   ocv             = 0
+  projection      = 1
+  ensemble        = 0
+  dtype           = None
   iteration       = None
   
   def __init__ (self, id=0):
@@ -65,6 +69,16 @@ class Config (object):
     self.FINE   = 0
     self.COARSE = 1
 
+    # working precision of the loaded results (unless specified by the dataclass itself)
+    # only dataclass instances of the solver are configured, since setting the precision
+    # of a dataclass class would affect all of its other users
+    dataclass = getattr (self.solver, 'dataclass', None)
+    if self.dtype != None and dataclass != None and getattr (dataclass, 'dtype', None) == None:
+      if isinstance (dataclass, type):
+        helpers.warning ('Precision can not be set for the dataclass \'%s\' of the solver (specify an instance instead)' % dataclass.__name__)
+      else:
+        dataclass.dtype = self.dtype
+
     # determine types
     if self.recycle:
       self.types  = lambda level : [self.FINE]
@@ -115,3 +129,6 @@ class Config (object):
     print   '  : RECYCLE      :    %-30s' % ( 'ENABLED' if self.recycle else 'DISABLED' )
     print   '  : INFERENCE    :    %-30s' % ( self.inference + (' [enforced]' if self.enforce else ' [not enforced]') )
     print   '  : OPTIMAL C.V. :    %-30s' % ( 'ENABLED' if self.ocv else 'DISABLED' )
+    print   '  : PROJECTION   :    %-30s' % ( 'ENABLED' if self.projection else 'DISABLED' )
+    print   '  : ENSEMBLE     :    %-30s' % ( 'MEMORY-MAPPED' if self.ensemble else 'IN MEMORY' )
+    print   '  : PRECISION    :    %-30s' % ( numpy.dtype (self.dtype) .name if self.dtype != None else 'float64' )
@@ -9,7 +9,6 @@
 # # # # # # # # # # # # # # # # # # # # # # # # # #
 
 import numpy
-from scipy import signal
 import h5py
 import copy, os
 import linecache
@@ -21,7 +20,7 @@ class Line (Slice):
   name       = 'line'
   dimensions = 1
 
-  def __init__ (self, qois=None, slices=1, dump=1, line=0.5, ranges=None, extent=[0,1], picker=None, eps=None):
+  def __init__ (self, qois=None, slices=1, dump=1, line=0.5, ranges=None, extent=[0,1], picker=None, eps=None, stride=1, dtype=None):
     
     # save configuration
     vars (self) .update ( locals() )
@@ -36,11 +35,15 @@ class Line (Slice):
 
     self.size = 1
   
-  def load (self, directory, verbosity):
+  def load (self, directory, verbosity, qois=None):
 
     # create a copy of this class
     results = copy.deepcopy (self)
 
+    # load only the specified qois
+    if qois != None:
+      results.qois = [ qoi for qoi in self.qois if qoi in qois ]
+
     # if picker is specified, get the dump
     if self.picker != None:
       self.dump = self.picker.pick (directory, verbosity)
@@ -49,39 +52,26 @@ class Line (Slice):
     step, time = self.read_dump (directory)
 
     # load all qois
-    for qoi in self.qois:
-
-      # single slices are loaded normally
-      if not hasattr (self.slices, '__iter__'):
-        filename = self.filename % ( step, self.qoinames [qoi], self.slices )
-        with h5py.File ( os.path.join (directory, filename), 'r' ) as f:
-          index = int ( self.line * f ['data'] .shape [1] )
-          results.data [qoi] = f ['data'] [:, index]
-
-      # for multiple specified files, compute arithmetic average
-      else:
-        filename = self.filename % ( step, self.qoinames [qoi], self.slices [0] )
-        with h5py.File ( os.path.join (directory, filename), 'r' ) as f:
-          index = int ( self.line * f ['data'] .shape [1] )
-          results.data [qoi] = f ['data'] [:, index]
-        for slice in self.slices [1:]:
-          filename = self.filename % ( step, self.qoinames [qoi], slice )
-          with h5py.File ( os.path.join (directory, filename), 'r' ) as f:
-            index = int ( self.line * f ['data'] .shape [1] )
-            results.data [qoi] += f ['data'] [:, index]
-      results.data [qoi] /= len (self.slices)
+    for qoi in results.qois:
+
+      # read only the (downsampled) line, averaged over all specified slices
+      results.data [qoi] = self.read ( directory, step, qoi, lambda shape : numpy.s_ [ :: self.stride, int ( self.line * shape [1] ) ] )
 
       # remove trivial dimensions
       results.data [qoi] = numpy.squeeze (results.data [qoi])
 
     # compute magnitude of vector-valued elements
     if results.data [qoi] .ndim > 1:
-      results.data [qoi] = numpy.linalg.norm (results.data [qoi], norm=2, axis=1)
+      results.data [qoi] = numpy.linalg.norm (results.data [qoi], ord=2, axis=1)
 
     # smoothen data
     if self.eps != None:
-      for qoi in self.qois:
-        results.smoothen (qoi, self.eps)
+      results.smoothen (self.eps)
+
+    # store data in the configured precision (slices are accumulated and smoothened in float64)
+    if self.dtype != None:
+      for qoi in results.qois:
+        results.data [qoi] = results.data [qoi] .astype (self.dtype)
 
     # load meta data
     results.meta = {}
@@ -97,6 +87,11 @@ class Line (Slice):
 
     return results
 
+  # parameters which determine the loaded results
+  def params (self):
+
+    return repr ( (Slice.params (self), self.line) )
+
   # serialized access to data
   def serialize (self, qoi):
     return self.data [qoi]
@@ -112,7 +107,7 @@ class Line (Slice):
   def init (self, a):
     self.meta = a.meta
     for key in a.data.keys():
-      self.data [key] = numpy.zeros (a.meta ['shape'])
+      self.data [key] = numpy.zeros (a.meta ['shape'], dtype=self.dtype)
 
   def resize (self, size):
 
@@ -121,9 +116,16 @@ class Line (Slice):
       shape = self.data [key] .shape
       if size > 1:
         shape += tuple([size])
-      self.data [key] = numpy.empty (shape)
+      self.data [key] = numpy.empty (shape, dtype=self.dtype)
       self.data [key] .fill (float ('nan'))
 
+  # allocate an estimate of the same data class without copying the data (see Slice.like)
+  def like (self, size=1):
+
+    result = Slice.like (self, size)
+    result.size = size
+    return result
+
   def clip (self, range=None):
 
     if range:
@@ -143,21 +145,9 @@ class Line (Slice):
             if upper != None:
               self.data [key] = numpy.minimum ( upper, self.data [key] )
 
-  def smoothen (self, qoi, eps):
-
-    length    = len (self [qoi])
-    deviation = length * eps / float (self.extent [1] - self.extent [0])
-    scaling   = 1.0 / float ( deviation * numpy.sqrt (2 * numpy.pi) )
-    window    = 2 * deviation
-    kernel    = scaling * signal.gaussian (window, deviation)
-    
-    self [qoi] = signal.fftconvolve (self [qoi], kernel, mode='same')
-
+  # lazy scaled view, data is scaled only when accessed
   def __rmul__ (self, a):
-    result = copy.deepcopy (self)
-    for key in result.data.keys():
-      result.data [key] *= a
-    return result
+    return Scaled (a, self)
 
   def __lmul__ (self, a):
     return self * a
@@ -170,16 +160,16 @@ class Line (Slice):
     if self.meta ['shape'] == a.meta ['shape']:
 
       for key in self.data.keys():
-        getattr (self.data [key], action) (a.data [key])
+        getattr (self.data [key], action) (a [key])
 
     if self.meta ['shape'] > a.meta ['shape']:
 
       factor = self.meta ['shape'] / a.meta ['shape']
 
       for key in self.data.keys():
-        #self.data [key] .__dict__ [action] ( numpy.squeeze ( numpy.kron ( a.data [key], numpy.ones ((1, factor)) ) ) )
+        #self.data [key] .__dict__ [action] ( numpy.squeeze ( numpy.kron ( a [key], numpy.ones ((1, factor)) ) ) )
         kronshape = (1, factor) if self.size == 1 else (factor, 1)
-        getattr (self.data [key], action) ( numpy.squeeze ( numpy.kron ( a.data [key], numpy.ones (kronshape) ) ) )
+        getattr (self.data [key], action) ( numpy.squeeze ( numpy.kron ( a [key], numpy.ones (kronshape) ) ) )
 
     elif self.meta ['shape'] < a.meta ['shape']:
 
@@ -192,7 +182,7 @@ class Line (Slice):
         self.data [key] = numpy.squeeze ( numpy.kron ( self.data [key], numpy.ones (kronshape) ) )
         print self.data [key] .shape
         print a.data [key] .shape
-        getattr (self.data [key], action) (a.data [key])
+        getattr (self.data [key], action) (a [key])
 
       self.meta = copy.deepcopy (a.meta)
 
@@ -205,12 +195,12 @@ class Line (Slice):
     return self.inplace (a, '__isub__')
 
   def __add__ (self, a):
-    result = copy.deepcopy (self)
+    result = self.duplicate ()
     result += a
     return result
 
   def __sub__ (self, a):
-    result = copy.deepcopy (self)
+    result = self.duplicate ()
     result -= a
     return result
 
@@ -9,6 +9,7 @@
 # # # # # # # # # # # # # # # # # # # # # # # # # #
 
 import numpy
+import textfile
 
 # TODO: filter out core objects from this that can be reused for snapshots too
 
@@ -21,12 +22,7 @@ class MetaDataDict (object):
   
   def load (self, filename, meta_keys):
     
-    outputfile = open ( filename, 'r' )
-    
-    data = numpy.genfromtxt ( outputfile, names = True, delimiter = ' ', dtype = None )
-    records = dict ( (key, data [key]) for key in data.dtype.names )
-    
-    outputfile.close()
+    records = textfile.records ( filename )
     
     # split metadata from actual data
     
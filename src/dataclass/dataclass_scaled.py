@@ -0,0 +1,102 @@
+
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+# Lazy scaled view of data classes
+# TODO: add paper, description and link           #
+#                                                 #
+# Jonas Sukys                                     #
+# CSE Lab, ETH Zurich, Switzerland                #
+# sukys.jonas@gmail.com                           #
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+
+import copy
+
+# view of a data class instance (base) scaled by a coefficient:
+# data of a qoi is scaled only when it is accessed, and the base is copied (materialized)
+# only when the view is written to, or when all of its data is required at once
+class Scaled (object):
+
+  def __init__ (self, coefficient, base):
+
+    self.coefficient = coefficient
+    self.base        = base
+
+    # whether the base is a materialized copy owned by this view
+    self.owned = 0
+
+  # copy of the base with all data scaled
+  def scaled (self):
+
+    result = copy.copy (self.base)
+    result.data = dict ( (key, self.coefficient * value) for key, value in self.base.data.iteritems () )
+    return result
+
+  # replace the base by its scaled copy, such that the view can be modified
+  def materialize (self):
+
+    if not self.owned:
+      self.base        = self.scaled ()
+      self.coefficient = 1
+      self.owned       = 1
+
+    return self.base
+
+  # all (scaled) data of the view
+  @property
+  def data (self):
+    return self.materialize () .data
+
+  # returns (scaled) data for a requested qoi
+  def __getitem__ (self, qoi):
+    if self.owned:
+      return self.base [qoi]
+    return self.coefficient * self.base [qoi]
+
+  # stores data for a requested qoi
+  def __setitem__ (self, qoi, data):
+    self.materialize () [qoi] = data
+
+  # methods of data classes which read or modify the data (of all qois)
+  methods = [ 'serialize', 'resize', 'clip', 'invalid', 'smoothen', 'init', 'inplace' ]
+
+  # attributes (e.g. meta data) and methods not involving the data are shared with the base,
+  # methods reading or modifying the data are applied to the materialized copy
+  def __getattr__ (self, name):
+
+    if name.startswith ('__') or name in [ 'coefficient', 'base', 'owned' ]:
+      raise AttributeError (name)
+
+    if name in Scaled.methods and not self.owned:
+      return getattr (self.materialize (), name)
+    return getattr (self.base, name)
+
+  # empty instance with the same meta data
+  def like (self, size=1):
+    return self.base.like (size)
+
+  def duplicate (self):
+    if self.owned:
+      return self.base.duplicate ()
+    return self.scaled ()
+
+  def __rmul__ (self, a):
+    if self.owned:
+      return Scaled (a, self.base)
+    return Scaled (a * self.coefficient, self.base)
+
+  def __iadd__ (self, a):
+    self.materialize () .__iadd__ (a)
+    return self
+
+  def __isub__ (self, a):
+    self.materialize () .__isub__ (a)
+    return self
+
+  def __add__ (self, a):
+    result = self.duplicate ()
+    result += a
+    return result
+
+  def __sub__ (self, a):
+    result = self.duplicate ()
+    result -= a
+    return result
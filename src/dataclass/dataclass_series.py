@@ -10,14 +10,25 @@
 
 import numpy
 import copy, os
-#from scipy import signal
+import hashlib
+import textfile
+import smoothing
+
+from dataclass_scaled import Scaled
 
 class Series (object):
 
   name       = 'series'
   dimensions = 1
 
-  def __init__ (self, qois=None, filename='statistics.dat', metaqois=['step', 't'], uid='t', span=[0, 1], sampling=1000, ranges=None, eps=None):
+  # binary cache of the post-processed results, stored next to the output file
+  cache      = 1
+  cachefile  = '%s.%s.npz'
+
+  # precision of the stored data (None for the default float64)
+  dtype      = None
+
+  def __init__ (self, qois=None, filename='statistics.dat', metaqois=['step', 't'], uid='t', span=[0, 1], sampling=1000, ranges=None, eps=None, cache=1, dtype=None):
     
     # save configuration
     vars (self) .update ( locals() )
@@ -25,36 +36,29 @@ class Series (object):
     self.meta = {}
     self.data = {}
 
-  def load (self, directory, verbosity):
+  def load (self, directory, verbosity, qois=None):
     
     results = copy.deepcopy (self)
 
-    outputfile = open ( os.path.join (directory, self.filename), 'r' )
-    
-    data = numpy.genfromtxt ( outputfile, names = True, usecols = self.qois + self.metaqois, delimiter = ' ', dtype = None )
-    records = dict ( (key, data [key]) for key in data.dtype.names )
-    
-    outputfile.close()
-    
-    # split metadata from actual data
-    for key in self.metaqois:
-      results.meta [key] = records [key]
-      del records [key]
-    results.data = records
+    # load only the specified qois
+    results.qois = self.select (qois)
 
-    # filter out duplicate entries and then sort results
-    if results.uid != None:
-      results.unique ()
-      results.sort   ()
+    # path to the output file
+    path = os.path.join (directory, self.filename)
 
-    # smoothen results
-    if results.eps != None:
-      for qoi in results.data.keys ():
-        results.smoothen (qoi, results.eps)
+    # reuse cached results, if valid
+    if not self.cache or not results.restore (path):
 
-    # interpolate results
-    if results.sampling != None:
-      results.interpolate ()
+      # parse and post-process the output file
+      results.parse (path)
+
+      # cache post-processed results for future reuse
+      if self.cache:
+        results.store (path)
+
+    # list of all loaded qois
+    if results.qois == 'all' or results.qois == None:
+      results.qois = results.data.keys ()
 
     # additional meta data
     results.meta ['xrange'] = results.span
@@ -64,6 +68,121 @@ class Series (object):
 
     return results
 
+  # select qois to be loaded: the specified projection (if any) of the configured qois ('all' or None loads all qois)
+  def select (self, qois=None):
+
+    if qois == None:
+      return self.qois
+    if self.qois == 'all' or self.qois == None:
+      return list (qois)
+    return [ qoi for qoi in self.qois if qoi in qois ]
+
+  # parse the output file and post-process the results
+  def parse (self, path):
+
+    # columns to be parsed
+    if self.qois == 'all' or self.qois == None:
+      usecols = None
+    else:
+      usecols = self.qois + self.metaqois
+    
+    # all columns are parsed into a single 2-D array (rows x columns)
+    names, table = textfile.read ( path, usecols )
+    
+    # columns of metadata and of actual data
+    meta = [ names.index (key) for key in self.metaqois ]
+    data = [ column for column, key in enumerate (names) if key not in self.metaqois ]
+
+    # filter out duplicate entries and then sort results
+    if self.uid != None:
+      table = self.unique ( table, names.index (self.uid) )
+
+    # split metadata from actual data
+    for key, column in zip (self.metaqois, meta):
+      self.meta [key] = numpy.ascontiguousarray ( table [ :, column ] )
+    values = table [ :, data ]
+
+    # smoothen results
+    if self.eps != None:
+      values = self.smoothen ( values, self.eps )
+
+    # interpolate results
+    if self.sampling != None:
+      self.meta [self.uid], values = self.interpolate ( self.meta [self.uid], values )
+
+    # store all data in a single contiguous block (one row per qoi) in the configured precision
+    block = numpy.ascontiguousarray (values.T, dtype=self.dtype)
+    self.data = dict ( (names [column], block [row]) for row, column in enumerate (data) )
+
+  # parameters which determine the post-processed results
+  def params (self):
+
+    params = (self.qois, self.metaqois, self.uid, self.span, self.sampling, self.eps)
+
+    # precision is only included if specified, such that existing caches remain valid
+    if self.dtype != None:
+      params += ( numpy.dtype (self.dtype) .name, )
+
+    return repr (params)
+
+  # path to the cache file for the current parameters
+  def cachepath (self, path):
+
+    return self.cachefile % ( path, hashlib.md5 ( self.params () ) .hexdigest () [:8] )
+
+  # key identifying the output file and the parameters used for post-processing
+  def key (self, path):
+
+    stat = os.stat (path)
+    return repr ( (stat.st_mtime, stat.st_size) ) + self.params ()
+
+  # restore post-processed results from the cache file, if it is still valid
+  def restore (self, path):
+
+    cachepath = self.cachepath (path)
+    if not os.path.exists (cachepath):
+      return 0
+
+    try:
+      cache = numpy.load (cachepath)
+      try:
+        if str (cache ['key']) != self.key (path):
+          return 0
+        for name in cache.files:
+          if name.startswith ('meta_'):
+            self.meta [ name [ len ('meta_') : ] ] = cache [name]
+          elif name.startswith ('data_'):
+            self.data [ name [ len ('data_') : ] ] = cache [name]
+      finally:
+        cache.close ()
+    except:
+      self.meta = {}
+      self.data = {}
+      return 0
+
+    return 1
+
+  # store post-processed results to the cache file
+  def store (self, path):
+
+    arrays = {}
+    arrays ['key'] = numpy.array ( self.key (path) )
+    for key in self.meta.keys ():
+      arrays [ 'meta_' + key ] = self.meta [key]
+    for key in self.data.keys ():
+      arrays [ 'data_' + key ] = self.data [key]
+
+    # write to a temporary file first, such that concurrent loaders never see a partial cache file
+    cachepath = self.cachepath (path)
+    temporary = cachepath + '.%d.tmp' % os.getpid ()
+    try:
+      with open (temporary, 'wb') as f:
+        numpy.savez (f, **arrays)
+      os.rename (temporary, cachepath)
+    except:
+      if os.path.exists (temporary):
+        os.remove (temporary)
+
   # returns data for a requested qoi
   def __getitem__ (self, qoi):
     return self.data [qoi]
@@ -260,63 +379,51 @@ class Series (object):
         self.data [key] = numpy.append ( self.data [key], nan_array )
   '''
 
-  # filter out duplicate entries (keep the first occurrence only)
-  def unique (self):
-    
-    # obtain positions of duplicate entries
-    positions = []
-    values    = []
-    for position, value in enumerate (self.meta [self.uid]):
-      if value in values:
-        positions .append (position)
-      else:
-        values .append (value)
-    
-    # remove duplicate entries from metadata
-    for key in self.meta.keys():
-      self.meta [key] = numpy.delete ( self.meta [key], positions )
-    
-    # remove duplicate entries from data
-    for key in self.data.keys():
-      self.data [key] = numpy.delete ( self.data [key], positions )
-  
-  def sort (self):
-    
-    # obtain sorting order
-    order = numpy.argsort (self.meta [self.uid])
-    
-    # sort metadata
-    for key in self.meta.keys():
-      self.meta [key] = self.meta [key] [order]
-    
-    # sort data
-    for key in self.data.keys():
-      self.data [key] = self.data [key] [order]
-  
-  def interpolate (self):
+  # filter out duplicate entries (keep the first occurrence only) and sort all rows of the table by the specified column
+  def unique (self, table, column):
+
+    # positions of the first occurrences in the sorted order
+    values, positions = numpy.unique ( table [ :, column ], return_index=True )
+
+    # gather all columns at once
+    return table [positions]
+
+  # linear interpolation of all columns of values (rows x columns) at once onto a uniform grid in the specified span
+  def interpolate (self, x, values):
 
     begin = self.span [0]
     end   = self.span [1]
 
-    if begin == None: begin = self.meta [self.uid] [0]
-    if end   == None: end   = self.meta [self.uid] [-1]
+    if begin == None: begin = x [0]
+    if end   == None: end   = x [-1]
     
-    leftnan  = numpy.abs (begin - self.meta [self.uid] [0] ) > 0.01 * numpy.abs (end - begin)
-    rightnan = numpy.abs (end   - self.meta [self.uid] [-1]) > 0.01 * numpy.abs (end - begin)
+    leftnan  = numpy.abs (begin - x [0] ) > 0.01 * numpy.abs (end - begin)
+    rightnan = numpy.abs (end   - x [-1]) > 0.01 * numpy.abs (end - begin)
     
     times = numpy.linspace ( begin, end, self.sampling )
-    for key in self.data.keys():
-      if leftnan:
-        left = float ('nan')
-      else:
-        left = self.data [key] [0]
-      if rightnan:
-        right = float ('nan')
-      else:
-        right = self.data [key] [-1]
-      self.data [key] = numpy.interp ( times, self.meta [self.uid], self.data [key], left=left, right=right )
-    
-    self.meta [self.uid] = times
+
+    # degenerate cases are left to numpy.interp
+    if len (x) < 2:
+      result = numpy.empty ( (len (times), values.shape [1]) )
+      for column in range (values.shape [1]):
+        left  = float ('nan') if leftnan  else values [0, column]
+        right = float ('nan') if rightnan else values [-1, column]
+        result [:, column] = numpy.interp ( times, x, values [:, column], left=left, right=right )
+      return times, result
+
+    # enclosing intervals and interpolation weights
+    upper   = numpy.clip ( numpy.searchsorted (x, times, side='right'), 1, len (x) - 1 )
+    lower   = upper - 1
+    weights = (times - x [lower]) / (x [upper] - x [lower])
+
+    result  = values [lower]
+    result += weights [:, numpy.newaxis] * (values [upper] - result)
+
+    # values outside of the available range
+    result [ times < x [0]  ] = float ('nan') if leftnan  else values [0]
+    result [ times > x [-1] ] = float ('nan') if rightnan else values [-1]
+
+    return times, result
   
   def clip (self, range=None):
 
@@ -340,7 +447,7 @@ class Series (object):
   def init (self, a):
     self.meta = a.meta
     for key in a.data.keys():
-      self.data [key] = numpy.zeros ( len ( a.data [key] ) )
+      self.data [key] = numpy.zeros ( len ( a.data [key] ), dtype=self.dtype )
 
   def resize (self, size):
 
@@ -348,9 +455,30 @@ class Series (object):
       shape = self.data [key] .shape
       if size > 1:
         shape += tuple([size])
-      self.data [key] = numpy.empty (shape)
+      self.data [key] = numpy.empty (shape, dtype=self.dtype)
       self.data [key] .fill (float ('nan'))
 
+  # allocate an estimate of the same data class without copying the data:
+  # meta data is shared, data arrays (extended by an axis of the specified size, if size > 1) are filled with NaNs
+  def like (self, size=1):
+
+    result = copy.copy (self)
+    result.data = {}
+    for key, value in self.data.iteritems ():
+      shape = numpy.shape (value)
+      if size > 1:
+        shape += tuple([size])
+      result.data [key] = numpy.empty (shape, dtype=self.dtype)
+      result.data [key] .fill (float ('nan'))
+    return result
+
+  # copy of the data (meta data is shared)
+  def duplicate (self):
+
+    result = copy.copy (self)
+    result.data = dict ( (key, numpy.array (value)) for key, value in self.data.iteritems () )
+    return result
+
   # check if the loaded result is invalid
   def invalid (self):
 
@@ -360,21 +488,14 @@ class Series (object):
 
     return 0
 
-  def smoothen (self, qoi, eps):
-
-    length    = len (self [qoi])
-    deviation = length * eps / float (self.span [1] - self.span [0])
-    scaling   = 1.0 / float ( deviation * numpy.sqrt (2 * numpy.pi) )
-    window    = 2 * deviation
-    kernel    = scaling * signal.gaussian (window, deviation)
+  # smoothen all columns of values (rows x columns) at once
+  def smoothen (self, values, eps):
 
-    self [qoi] = signal.fftconvolve (self [qoi], kernel, mode='same')
+    return smoothing.smoothen ( values.T, self.span [1] - self.span [0], eps ) .T
 
+  # lazy scaled view, data is scaled only when accessed
   def __rmul__ (self, a):
-    result = copy.deepcopy (self)
-    for key in result.data.keys():
-      result.data [key] *= a
-    return result
+    return Scaled (a, self)
 
   def __lmul__ (self, a):
     return self * a
@@ -383,23 +504,23 @@ class Series (object):
     if not self.data:
       self.init (a)
     for key in self.data.keys():
-      self.data [key] += a.data [key]
+      self.data [key] += a [key]
     return self
   
   def __isub__ (self, a):
     if not self.data:
       self.init (a)
     for key in self.data.keys():
-      self.data [key] -= a.data [key]
+      self.data [key] -= a [key]
     return self
 
   def __add__ (self, a):
-    result = copy.deepcopy (self)
+    result = self.duplicate ()
     result += a
     return result
 
   def __sub__ (self, a):
-    result = copy.deepcopy (self)
+    result = self.duplicate ()
     result -= a
     return result
 
@@ -26,11 +26,15 @@ class Shells (Series):
     self.meta = {}
     self.data = {}
 
-  def load (self, directory, verbosity):
+  def load (self, directory, verbosity, qois=None):
 
     # create a copy of this class or results
     results = copy.deepcopy (self)
 
+    # load only the specified qois
+    if qois != None:
+      results.qois = [ qoi for qoi in results.qois if qoi in qois ]
+
     # get results for a Series dataclass
     series = copy.deepcopy (self)
     series = super (Shells, series)
@@ -46,7 +50,7 @@ class Shells (Series):
     # merge shells
     shape = (results.sampling, results.count)
     for qoi in results.qois:
-      results.data [qoi] = numpy.empty (shape, dtype=float)
+      results.data [qoi] = numpy.empty (shape, dtype=results.dtype)
       for shell in xrange (results.count):
         results.data [qoi] [ : , shell ] = series.data [ '%s_shell_avg%d' % (qoi, shell + 1) ] [:]
 
@@ -60,6 +64,11 @@ class Shells (Series):
 
     return results
 
+  # parameters which determine the loaded results
+  def params (self):
+
+    return repr ( (self.name, self.qois, self.metaqois, self.uid, self.span, self.sampling, self.count, self.extent) )
+
   # serialized access to data
   def serialize (self, qoi):
 
@@ -74,7 +83,7 @@ class Shells (Series):
       shape = self.data [key] .shape
       if size > 1:
         shape += tuple([size])
-      self.data [key] = numpy.empty (shape)
+      self.data [key] = numpy.empty (shape, dtype=self.dtype)
       self.data [key] .fill (float ('nan'))
 
   def __str__ (self):
@@ -9,17 +9,28 @@
 # # # # # # # # # # # # # # # # # # # # # # # # # #
 
 import numpy
-from scipy import signal
 import h5py
 import copy, os
 import linecache
+import cPickle
+import multiprocessing
+import atexit
+import smoothing
+
+from dataclass_scaled import Scaled
 
 class Slice (object):
 
   name       = 'slice'
   dimensions = 2
 
-  def __init__ (self, qois=None, slices=1, dump=1, ranges=None, extent=[0,1], picker=None, eps=None):
+  # size of the HDF5 chunk cache used for reading slices (in bytes)
+  chunkcache = 64 * 1024 ** 2
+
+  # precision of the stored data (None for the default float64)
+  dtype = None
+
+  def __init__ (self, qois=None, slices=1, dump=1, ranges=None, extent=[0,1], picker=None, eps=None, stride=1, dtype=None):
     
     # save configuration
     vars (self) .update ( locals() )
@@ -32,11 +43,15 @@ class Slice (object):
     self.meta = {}
     self.data = {}
 
-  def load (self, directory, verbosity):
+  def load (self, directory, verbosity, qois=None):
 
     # create a copy of this class
     results = copy.deepcopy (self)
 
+    # load only the specified qois
+    if qois != None:
+      results.qois = [ qoi for qoi in self.qois if qoi in qois ]
+
     # if picker is specified, get the dump
     if self.picker != None:
       self.dump = self.picker.pick (directory, verbosity)
@@ -45,36 +60,26 @@ class Slice (object):
     step, time = self.read_dump (directory)
 
     # load all qois
-    for qoi in self.qois:
+    for qoi in results.qois:
 
-      # single slices are loaded normally
-      if not hasattr (self.slices, '__iter__'):
-        filename = self.filename % ( step, self.qoinames [qoi], self.slices )
-        with h5py.File ( os.path.join (directory, filename), 'r' ) as f:
-          results.data [qoi] = f ['data'] [:]
-      
-      # for multiple specified files, compute arithmetic average
-      else:
-        filename = self.filename % ( step, self.qoinames [qoi], self.slices [0] )
-        with h5py.File ( os.path.join (directory, filename), 'r' ) as f:
-          results.data [qoi] = f ['data'] [:]
-        for slice in self.slices [1:]:
-          filename = self.filename % ( step, self.qoinames [qoi], slice )
-          with h5py.File ( os.path.join (directory, filename), 'r' ) as f:
-            results.data [qoi] += f ['data'] [:]
-        results.data [qoi] /= len (self.slices)
+      # read (downsampled) slices, averaged over all specified slices
+      results.data [qoi] = self.read ( directory, step, qoi, lambda shape : numpy.s_ [ :: self.stride, :: self.stride ] )
       
       # remove trivial dimensions
       results.data [qoi] = numpy.squeeze (results.data [qoi])
 
       # compute magnitude of vector-valued elements
       if results.data [qoi] .ndim > 2:
-        results.data [qoi] = numpy.linalg.norm (results.data [qoi], norm=2, axis=2)
+        results.data [qoi] = numpy.linalg.norm (results.data [qoi], ord=2, axis=2)
+
+    # smoothen data
+    if self.eps != None:
+      results.smoothen (self.eps)
 
-      # smoothen data
-      if self.eps != None:
-        for qoi in self.qois:
-          results.smoothen (qoi, self.eps)
+    # store data in the configured precision (slices are accumulated and smoothened in float64)
+    if self.dtype != None:
+      for qoi in results.qois:
+        results.data [qoi] = results.data [qoi] .astype (self.dtype)
     
     # load meta data
     results.meta = {}
@@ -96,6 +101,49 @@ class Slice (object):
 
     return results
 
+  # read the specified hyperslab of the dataset of the qoi, averaged over all specified slices
+  # selection is a function of the shape of the dataset returning the (h5py) hyperslab selection
+  # each file is opened once and slices are accumulated into a single preallocated buffer
+  def read (self, directory, step, qoi, selection):
+
+    slices = self.slices if hasattr (self.slices, '__iter__') else [ self.slices ]
+
+    buffer  = None
+    scratch = None
+    for slice in slices:
+
+      path = os.path.join ( directory, self.filename % ( step, self.qoinames [qoi], slice ) )
+
+      # larger chunk cache (if supported by h5py)
+      try:
+        f = h5py.File ( path, 'r', rdcc_nbytes = self.chunkcache )
+      except TypeError:
+        f = h5py.File ( path, 'r' )
+
+      with f:
+
+        dataset = f ['data']
+        hyperslab = selection (dataset.shape)
+
+        # allocate buffers according to the shape of the hyperslab
+        if buffer is None:
+          shape  = numpy.lib.stride_tricks.as_strided ( numpy.zeros (1), shape = dataset.shape, strides = (0,) * len (dataset.shape) ) [hyperslab] .shape
+          buffer = numpy.empty (shape)
+          dataset.read_direct (buffer, hyperslab)
+          continue
+
+        # accumulate further slices
+        if scratch is None:
+          scratch = numpy.empty (buffer.shape)
+        dataset.read_direct (scratch, hyperslab)
+        buffer += scratch
+
+    # arithmetic average
+    if len (slices) > 1:
+      buffer /= len (slices)
+
+    return buffer
+
   # read dump log
   def read_dump (self, directory):
 
@@ -111,6 +159,18 @@ class Slice (object):
 
     return step, time
 
+  # parameters which determine the loaded results
+  def params (self):
+
+    picker = self.picker.params () if hasattr (self.picker, 'params') else None
+    params = (self.name, self.qois, self.slices, self.dump, self.ranges, self.extent, picker, self.eps, self.stride)
+
+    # precision is only included if specified
+    if self.dtype != None:
+      params += ( numpy.dtype (self.dtype) .name, )
+
+    return repr (params)
+
   # serialized access to data
   def serialize (self, qoi):
 
@@ -133,9 +193,30 @@ class Slice (object):
       shape = self.data [key] .shape
       if size > 1:
         shape += tuple([size])
-      self.data [key] = numpy.empty (shape)
+      self.data [key] = numpy.empty (shape, dtype=self.dtype)
       self.data [key] .fill (float ('nan'))
 
+  # allocate an estimate of the same data class without copying the data:
+  # meta data is shared, data arrays (extended by an axis of the specified size, if size > 1) are filled with NaNs
+  def like (self, size=1):
+
+    result = copy.copy (self)
+    result.data = {}
+    for key, value in self.data.iteritems ():
+      shape = numpy.shape (value)
+      if size > 1:
+        shape += tuple([size])
+      result.data [key] = numpy.empty (shape, dtype=self.dtype)
+      result.data [key] .fill (float ('nan'))
+    return result
+
+  # copy of the data (meta data is shared)
+  def duplicate (self):
+
+    result = copy.copy (self)
+    result.data = dict ( (key, numpy.array (value)) for key, value in self.data.iteritems () )
+    return result
+
   def clip (self, range=None):
 
     if range:
@@ -164,22 +245,20 @@ class Slice (object):
 
     return 0
 
-  def smoothen (self, qoi, eps):
+  # smoothen the specified qois (all loaded qois by default) in a single batched convolution
+  def smoothen (self, eps, qois=None):
+
+    if qois == None:
+      qois = self.data.keys ()
 
-    length    = len (self [qoi])
-    deviation = length * eps / float (self.extent [1] - self.extent [0])
-    scaling   = 1.0 / float ( deviation * numpy.sqrt (2 * numpy.pi) )
-    window    = 2 * deviation
-    kernel    = scaling ** 2 * numpy.outer (signal.gaussian (window, deviation), signal.gaussian (window, deviation))
+    channels = smoothing.smoothen ( numpy.array ( [ self.data [qoi] for qoi in qois ] ), self.extent [1] - self.extent [0], eps )
 
-    self [qoi] = signal.fftconvolve (self [qoi], kernel, mode='same')
-    #self [qoi] = signal.convolve (self [qoi], kernel, mode='same')
+    for channel, qoi in enumerate (qois):
+      self.data [qoi] = channels [channel]
 
+  # lazy scaled view, data is scaled only when accessed
   def __rmul__ (self, a):
-    result = copy.deepcopy (self)
-    for key in result.data.keys():
-      result.data [key] *= a
-    return result
+    return Scaled (a, self)
 
   def __lmul__ (self, a):
     return self * a
@@ -189,7 +268,7 @@ class Slice (object):
     if self.meta ['shape'] == a.meta ['shape']:
 
       for key in self.data.keys():
-        getattr (self.data [key], action) (a.data [key])
+        getattr (self.data [key], action) (a [key])
 
     if self.meta ['shape'] [0] > a.meta ['shape'] [0] and self.meta ['shape'] [1] > a.meta ['shape'] [1]:
 
@@ -197,7 +276,7 @@ class Slice (object):
       yfactor = self.meta ['shape'] [1] / a.meta ['shape'] [1]
 
       for key in self.data.keys():
-        getattr (self.data [key], action) ( numpy.kron ( a.data [key], numpy.ones ((xfactor, yfactor)) ) )
+        getattr (self.data [key], action) ( numpy.kron ( a [key], numpy.ones ((xfactor, yfactor)) ) )
 
     elif self.meta ['shape'] [0] < a.meta ['shape'] [0] and self.meta ['shape'] [1] < a.meta ['shape'] [1]:
 
@@ -206,7 +285,7 @@ class Slice (object):
 
       for key in self.data.keys():
         self.data [key] = numpy.kron ( self.data [key], numpy.ones ((xfactor, yfactor)) )
-        getattr (self.data [key], action) (a.data [key])
+        getattr (self.data [key], action) (a [key])
 
       self.meta = copy.deepcopy (a.meta)
 
@@ -225,12 +304,12 @@ class Slice (object):
     return self.inplace (a, '__isub__')
 
   def __add__ (self, a):
-    result = copy.deepcopy (self)
+    result = self.duplicate ()
     result += a
     return result
 
   def __sub__ (self, a):
-    result = copy.deepcopy (self)
+    result = self.duplicate ()
     result -= a
     return result
 
@@ -267,6 +346,11 @@ class Picker (object):
 
     return dump
 
+  # parameters which determine the picked dump
+  def params (self):
+
+    return ( type (self) .__name__, self.qoi )
+
   # read dump log
   def read_dump (self, directory):
 
@@ -288,60 +372,133 @@ def get_max (params):
 
   results = dataclass (qois = [qoi], slices = slices, dump = dump)
   results = results.load (directory, verbosity)
-  results.smoothen (qoi, eps)
+  results.smoothen (eps)
   return numpy.max (results [qoi])
 
+# pools of worker processes shared by all pickers (one for each number of workers), created on first use
+# and closed at exit
+pools = {}
+
+# close all pools of worker processes
+def close ():
+
+  for workers in pools.keys ():
+    pool = pools.pop (workers)
+    pool.close ()
+    pool.join ()
+
+atexit.register (close)
+
+# evaluate function for all tasks using a shared pool of worker processes
+def evaluate (function, tasks, workers):
+
+  # worker processes of a parallel loading pool are not allowed to fork
+  if multiprocessing.current_process () .daemon or len (tasks) < 2:
+    return map (function, tasks)
+
+  if workers not in pools:
+    pools [workers] = multiprocessing.Pool (workers)
+
+  try:
+    return pools [workers] .map (function, tasks)
+  except:
+    pool = pools.pop (workers)
+    pool.terminate ()
+    pool.join ()
+    raise
+
+# picker of the dump with the largest (smoothened) maximum of the qoi:
+# all dumps are searched by default, a faster coarse-to-fine search (which might miss
+# the global maximum if the qoi is not unimodal in time) is used if exhaustive=False
 class Smooth_Picker (Picker):
 
-  def __init__ (self, qoi, slices, eps=None, dataclass=Slice):
+  def __init__ (self, qoi, slices, eps=None, dataclass=Slice, exhaustive=True):
 
-    self.qoi       = qoi
-    self.slices    = slices
-    self.eps       = eps
-    self.dataclass = dataclass
-    self.cachefile = 'picker_%s_%.1f.cache' % (dataclass.name, eps)
+    self.qoi        = qoi
+    self.slices     = slices
+    self.eps        = eps
+    self.dataclass  = dataclass
+    self.exhaustive = exhaustive
+    self.indexfile  = 'picker_%s.index' % dataclass.name
 
   # pick required dump
   def pick (self, directory, verbosity):
 
-    # laod cached dump, if exists
-    if os.path.exists ( os.path.join (directory, self.cachefile) ):
-      with open ( os.path.join (directory, self.cachefile), 'r' ) as f:
-        return int ( f.readlines () [0] .strip () )
+    dumps, steps, times = self.read_dump (directory)
 
-    # pick the specified dump
+    # maxima of all previously evaluated dumps for the current qoi, slices and eps
+    index  = self.restore (directory)
+    key    = (self.qoi, repr (self.slices), self.eps)
+    maxima = index.setdefault (key, {})
+    count  = len (maxima)
 
-    import scipy
+    # exhaustive search over all dumps
+    if self.exhaustive:
+      best = self.search (directory, verbosity, dumps, maxima, range (len (dumps)))
 
-    dumps, steps, times = self.read_dump (directory)
+    # coarse-to-fine search: evaluate a coarse subset of dumps first, then refine around the maximum
+    else:
+      radius = max ( 1, int ( numpy.sqrt (len (dumps)) ) )
+      best   = self.search (directory, verbosity, dumps, maxima, range (0, len (dumps), radius) + [len (dumps) - 1])
+      while radius > 1:
+        step   = max ( 1, radius // 2 )
+        best   = self.search (directory, verbosity, dumps, maxima, range ( max (0, best - radius), min (len (dumps), best + radius + 1), step ))
+        radius = step
 
-    tasks = []
-    for idx, dump in enumerate (dumps):
-      tasks.append ( (self.dataclass, self.qoi, self.slices, dump, directory, verbosity, self.eps) )
+    # store evaluated maxima for future reuse
+    if len (maxima) > count:
+      self.store (directory, index)
 
-    import multiprocessing
-    if self.dataclass.dimensions == 1:
-      workers = None
-    else:
-      workers = 1
-    pool = multiprocessing.Pool (workers)
-    max = pool.map (get_max, tasks)
+    return dumps [best]
 
-    '''
-    max = numpy.empty (len (dumps))
-    for idx, dump in enumerate (dumps):
+  # parameters which determine the picked dump
+  def params (self):
 
-      results = self.dataclass (qois = [self.qoi], slices = self.slices, dump = dump)
-      results = results.load (directory, verbosity)
-      results.smoothen (self.qoi, self.eps)
-      max [idx] = numpy.max (results [self.qoi])
-    '''
+    return ( type (self) .__name__, self.qoi, self.slices, self.eps, self.dataclass.name, self.exhaustive )
 
-    dump = dumps [ numpy.argmax (max) ]
+  # position of the dump with the largest maximum among the specified candidate positions (missing maxima are evaluated)
+  def search (self, directory, verbosity, dumps, maxima, candidates):
 
-    # cache dump for future reuse
-    with open ( os.path.join (directory, self.cachefile), 'w' ) as f:
-      f.write ( str (dump) )
+    tasks = []
+    for position in candidates:
+      if dumps [position] not in maxima:
+        tasks.append ( (self.dataclass, self.qoi, self.slices, dumps [position], directory, verbosity, self.eps) )
 
-    return dump
+    # multi-dimensional dumps are evaluated serially to limit memory usage
+    if self.dataclass.dimensions == 1:
+      workers = None
+    else:
+      workers = 1
 
+    for task, value in zip ( tasks, evaluate (get_max, tasks, workers) ):
+      maxima [ task [3] ] = value
+
+    values = [ maxima [ dumps [position] ] for position in candidates ]
+    return candidates [ numpy.argmax (values) ]
+
+  # load the index of evaluated maxima for all dumps
+  def restore (self, directory):
+
+    path = os.path.join (directory, self.indexfile)
+    if not os.path.exists (path):
+      return {}
+
+    try:
+      with open (path, 'rb') as f:
+        return cPickle.load (f)
+    except:
+      return {}
+
+  # store the index of evaluated maxima for all dumps
+  def store (self, directory, index):
+
+    # write to a temporary file first, such that an interrupted save does not corrupt the index
+    path = os.path.join (directory, self.indexfile)
+    temporary = path + '.%d.tmp' % os.getpid ()
+    try:
+      with open (temporary, 'wb') as f:
+        cPickle.dump (index, f, cPickle.HIGHEST_PROTOCOL)
+      os.rename (temporary, path)
+    except:
+      if os.path.exists (temporary):
+        os.remove (temporary)
@@ -0,0 +1,187 @@
+
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+# Memory-mapped store for the loaded results of an ensemble of samples
+# TODO: add paper, description and link
+#
+# Jonas Sukys
+# CSE Lab, ETH Zurich, Switzerland
+# sukys.jonas@gmail.com
+# All rights reserved.
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+
+# === global imports
+
+import os
+import cPickle
+import numpy
+
+# === classes
+
+# ensemble store for a single level and type:
+# the data of each qoi is stored in a separate memory-mapped file (one row for each sample),
+# results are written into the store once and then only hold (zero-copy) views of their rows
+class Ensemble (object):
+
+  def __init__ (self, directory, dtype=numpy.float64):
+
+    # store configuration
+    vars (self) .update ( locals() )
+
+    self.headerfile = os.path.join (directory, 'ensemble.header')
+    self.datafile   = os.path.join (directory, 'ensemble.%s.dat')
+
+    # number of rows (samples) of each qoi
+    self.capacity = 0
+
+    # shape of the data of each qoi
+    self.shapes = {}
+
+    # mask of samples with valid data for each qoi
+    self.valid = {}
+
+    # meta data (shared by all samples)
+    self.meta = None
+
+    # opened memory maps
+    self.arrays = {}
+
+    self.changed = 0
+
+    self.restore ()
+
+  # restore the header of an existing store
+  def restore (self):
+
+    if not os.path.exists (self.headerfile):
+      return
+
+    try:
+      with open (self.headerfile, 'rb') as f:
+        dtype, capacity, shapes, valid, meta = cPickle.load (f)
+    except:
+      return
+
+    # store was created with a different precision
+    if dtype != numpy.dtype (self.dtype) .str:
+      return
+
+    # data files are missing or incomplete
+    for qoi, shape in shapes.iteritems ():
+      path = self.datafile % qoi
+      if not os.path.exists (path) or os.path.getsize (path) < self.size (capacity, shape):
+        return
+
+    self.capacity = capacity
+    self.shapes   = shapes
+    self.valid    = valid
+    self.meta     = meta
+
+  # size of a data file (in bytes)
+  def size (self, capacity, shape):
+
+    return capacity * int ( numpy.prod (shape) ) * numpy.dtype (self.dtype) .itemsize
+
+  # memory-mapped data of all samples for the specified qoi
+  def array (self, qoi):
+
+    if qoi not in self.arrays:
+      shape = (self.capacity, ) + self.shapes [qoi]
+      self.arrays [qoi] = numpy.memmap ( self.datafile % qoi, dtype=self.dtype, mode='r+', shape=shape )
+
+    return self.arrays [qoi]
+
+  # allocate (or extend) the data file for the specified qoi
+  def allocate (self, qoi):
+
+    with open (self.datafile % qoi, 'ab') as f:
+      f.truncate ( self.size (self.capacity, self.shapes [qoi]) )
+
+  # increase the number of rows of all data files
+  def reserve (self, capacity):
+
+    self.capacity = capacity
+
+    # previously returned views remain valid, since they keep their own memory maps
+    self.arrays = {}
+
+    for qoi in self.shapes.keys ():
+      self.allocate (qoi)
+      valid = numpy.zeros (capacity, dtype=bool)
+      valid [ : len (self.valid [qoi]) ] = self.valid [qoi]
+      self.valid [qoi] = valid
+
+  # write the data of the result of the specified sample into the store
+  # and replace it by the views of the corresponding rows
+  def store (self, sample, result):
+
+    if not hasattr (result, 'data'):
+      return
+
+    if sample >= self.capacity:
+      self.reserve ( max (sample + 1, 2 * self.capacity) )
+
+    for qoi, values in result.data.items ():
+
+      values = numpy.asarray (values)
+
+      # first sample for this qoi
+      if qoi not in self.shapes and values.size > 0:
+        self.shapes [qoi] = values.shape
+        self.valid  [qoi] = numpy.zeros (self.capacity, dtype=bool)
+        self.allocate (qoi)
+
+      # empty data and data of varying shape can not be stored and is kept in memory
+      if values.size == 0 or values.shape != self.shapes [qoi]:
+        continue
+
+      array = self.array (qoi)
+      array [sample] = values
+      result.data [qoi] = array [sample] .view (numpy.ndarray)
+      self.valid [qoi] [sample] = 1
+
+    if self.meta == None:
+      self.meta = result.meta
+
+    self.changed = 1
+
+  # mark the data of the specified sample as invalid
+  def discard (self, sample):
+
+    if sample < self.capacity:
+      for valid in self.valid.values ():
+        valid [sample] = 0
+      self.changed = 1
+
+  # write the data to disk and update the header
+  def flush (self):
+
+    if not self.changed:
+      return
+
+    for array in self.arrays.values ():
+      array.flush ()
+
+    # write to a temporary file first, such that an interrupted save does not corrupt the header
+    temporary = self.headerfile + '.tmp'
+    try:
+      with open (temporary, 'wb') as f:
+        cPickle.dump ( (numpy.dtype (self.dtype) .str, self.capacity, self.shapes, self.valid, self.meta), f, cPickle.HIGHEST_PROTOCOL )
+      os.rename (temporary, self.headerfile)
+    except:
+      if os.path.exists (temporary):
+        os.remove (temporary)
+
+    self.changed = 0
+
+  # (zero-copy) view of the data of all samples for the specified qoi
+  def __getitem__ (self, qoi):
+
+    return self.array (qoi) .view (numpy.ndarray)
+
+  # (zero-copy) view of the data of the specified sample and qoi (None if it is not held in the store)
+  def row (self, sample, qoi):
+
+    if qoi not in self.shapes or sample >= self.capacity or not self.valid [qoi] [sample]:
+      return None
+
+    return self.array (qoi) [sample] .view (numpy.ndarray)
@@ -36,6 +36,8 @@ def parse ():
   parser.add_argument ('-n', '--noinit',        action = "count", default = 0,  help = 'do not execute solver init scripts')
   parser.add_argument ('-b', '--batch',         action = "store", default = 1,  help = 'group small jobs of the same level and type into a single batch job', type=int)
   parser.add_argument ('-t', '--tolerate',      action = "count", default = 0,  help = 'tolerate faults and continue using loaded samples only, discarding failed samples')
+  parser.add_argument ('-c', '--incremental',   action = "count", default = 0,  help = 'reload only samples that changed since the previous iteration')
+  parser.add_argument ('-w', '--workers',       action = "store", default = None, help = 'number of worker processes for loading results (default: \'local.workers\')', type=int)
 
   global params
   params = parser.parse_args()
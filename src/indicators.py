@@ -14,7 +14,6 @@
 import os
 import sys
 import numpy
-from itertools import izip
 
 # === local imports
 
@@ -75,7 +74,7 @@ class Indicator (object):
 # class for computation, inference and reporting of all indicators
 class Indicators (object):
   
-  def __init__ (self, indicator, distance, levels, levels_types, pick, FINE, COARSE, works, pairworks, recycle, inference = 'diffs', enforce = True, ocv = False):
+  def __init__ (self, indicator, distance, levels, levels_types, pick, FINE, COARSE, works, pairworks, recycle, inference = 'diffs', enforce = True, ocv = False, qois = None, stacked_indicator = None, stacked_distance = None, rescale = None):
     
     # store configuration 
     vars (self) .update ( locals() )
@@ -89,6 +88,9 @@ class Indicators (object):
     # initialize control variate COEFFICIENTS
     self.coefficients = Coefficients (self.levels, self.recycle)
 
+    # indicator values of the available samples for each level and type (used to rescale the distances)
+    self.units = helpers.level_type_list (self.levels)
+
   def accuracy_mean (self, deviation, size):
 
     if size < 1:
@@ -110,7 +112,7 @@ class Indicators (object):
     else:
       return deviation * numpy.sqrt (0.5 / (size - 1))
 
-  def compute (self, mcs, indices, L0):
+  def compute (self, mcs, indices, L0, loading=None):
 
     print
     print ' :: Computing INDICATORS...',
@@ -120,13 +122,17 @@ class Indicators (object):
 
     self.available = 1
 
+    # make sure that the qois required by the indicators are loaded (deferred results are loaded only if their values are not available)
+    for mc in mcs:
+      mc.require (self.qois, lazy=1, loading=loading)
+
     # === VALUES and DISTANCES
 
     # evaluates indicators for each level, type and sample for the specified indices
-    values = self.values (mcs, indices)
+    values = self.values (mcs, indices, loading)
 
     # evaluate distances between indicators for every two consecute levels of each sample for the specified indices
-    distances = self.distances (mcs, indices)
+    distances = self.distances (mcs, indices, loading)
 
     # === MEAN, VARIANCE & DEVIATION indicators
 
@@ -243,7 +249,7 @@ class Indicators (object):
 
     print 'done.'
 
-  def optimize (self, mcs, indices, L0, forecast=False):
+  def optimize (self, mcs, indices, L0, forecast=False, loading=None):
 
     if self.ocv:
       print
@@ -263,7 +269,7 @@ class Indicators (object):
         self.coefficients.optimize (self, samples=counts)
 
     # re-evaluate distances between indicators for every two consecute levels of each sample for the specified indices
-    distances = self.distances (mcs, indices)
+    distances = self.distances (mcs, indices, loading)
     
     # === MEAN DIFF and VARIANCE DIFF level distance indicators
     # (WITH optimal control variate coefficients computed above)
@@ -324,7 +330,7 @@ class Indicators (object):
         print ' :: OPTIMIZATION (OCV vs. PLAIN): %.2f' % self.coefficients.optimization
 
   # evaluates indicators for each sample (alternatively, specific indices can also be provided)
-  def values (self, mcs, indices=None):
+  def values (self, mcs, indices=None, loading=None):
 
     # container for results
     values = helpers.level_type_list (self.levels)
@@ -337,20 +343,28 @@ class Indicators (object):
         values [level] [type] = numpy.array ( [ float('nan') ] )
         continue
 
-      # evaluate indicators
-      if indices == None:
-        values [level] [type] = numpy.array ( [ self.indicator (result) for result in mcs [ self.pick [level] [type] ] .results if result != None ] )
-      else:
-        values [level] [type] = numpy.array ( [ self.indicator (result) for sample, result in enumerate (mcs [ self.pick [level] [type] ] .results) if sample in indices [level] ] )
+      mc = mcs [ self.pick [level] [type] ]
+
+      # positions of the available results for the specified indices
+      positions = self.positions ( [ mc ], indices [level] if indices != None else None )
+
+      # evaluate indicators, reusing persistent values of finished samples
+      positions, values [level] [type] = self.cached ( 'values', (), [ mc ], positions, lambda positions : self.indicate (mc, positions), loading )
+
+      # keep indicator values of the available samples
+      self.units [level] [type] = dict ( zip (positions, values [level] [type]) )
 
       # handle unavailable simulations
       if len (values [level] [type]) == 0:
         values [level] [type] = numpy.array ( [ float('nan') ] )
+
+    # keep the indicator values for the next (incremental) update
+    self.memorize (mcs)
     
     return values
 
   # evaluates distances between indicators on every two consecute levels for each sample (alternatively, specific indices can also be provided)
-  def distances (self, mcs, indices=None):
+  def distances (self, mcs, indices=None, loading=None):
     
     # container for results
     distances = helpers.level_list (self.levels)
@@ -362,25 +376,167 @@ class Indicators (object):
 
       # for coarsest level, distance is taken w.r.t. 'None'
       if level == self.L0:
-        if indices == None:
-          distances [level] = numpy.array ( [ self.distance (self.coefficients.values [level] * result, None) for result in mcs [ self.pick [level] [self.FINE] ] .results ] )
+
+        fine = mcs [ self.pick [level] [self.FINE] ]
+        positions = self.positions ( [ fine ], indices [level] if indices != None else None )
+        key = ( self.coefficients.values [level], )
+
+        # rescale indicator values of the fine samples, if distances are homogeneous
+        units = self.rescalable (level, [self.FINE], positions)
+        if units != None:
+          distances [level] = numpy.asarray ( self.rescale (self.coefficients.values [level], units [0], None, None), dtype=float ) .reshape (-1)
+
+        # evaluate distances, reusing persistent values of finished samples with the same coefficients
         else:
-          distances [level] = numpy.array ( [ self.distance (self.coefficients.values [level] * result, None) for sample, result in enumerate (mcs [ self.pick [level] [self.FINE] ] .results) if sample in indices [level] ] )
+          positions, distances [level] = self.cached ( 'distances', key, [ fine ], positions, lambda positions : self.separate (level, fine, None, positions), loading )
       
       # for the remaining levels, evaluate distance indicators between every two consecutive levels
       elif level > self.L0:
-        zipped = izip (mcs [ self.pick [level] [self.FINE] ] .results, mcs [ self.pick [level] [self.COARSE] ] .results)
-        if indices == None:
-          distances [level] = numpy.array ( [ self.distance (self.coefficients.values [level] * fine, self.coefficients.values [level - 1] * coarse) for fine, coarse in zipped ] )
+
+        fine   = mcs [ self.pick [level] [self.FINE  ] ]
+        coarse = mcs [ self.pick [level] [self.COARSE] ]
+        positions = self.positions ( [ fine, coarse ], indices [level] if indices != None else None )
+        key = ( self.coefficients.values [level], self.coefficients.values [level - 1] )
+
+        # rescale indicator values of the fine and coarse samples, if distances are homogeneous
+        units = self.rescalable (level, [self.FINE, self.COARSE], positions)
+        if units != None:
+          distances [level] = numpy.asarray ( self.rescale (self.coefficients.values [level], units [0], self.coefficients.values [level - 1], units [1]), dtype=float ) .reshape (-1)
+
+        # evaluate distances, reusing persistent values of finished samples with the same coefficients
         else:
-          distances [level] = numpy.array ( [ self.distance (self.coefficients.values [level] * fine, self.coefficients.values [level - 1] * coarse) for sample, (fine, coarse) in enumerate (zipped) if sample in indices [level] ] )
+          positions, distances [level] = self.cached ( 'distances', key, [ fine, coarse ], positions, lambda positions : self.separate (level, fine, coarse, positions), loading )
       
       # handle unavailable simulations
       if level < self.L0 or len (distances [level]) == 0:
         distances [level] = numpy.array ( [ float('nan') ] )
 
+    # keep the level distances for the next (incremental) update
+    self.memorize (mcs)
+
     return distances
-  
+
+  # evaluates indicators for the (loaded) results at the specified positions
+  def indicate (self, mc, positions):
+
+    # evaluate vectorized indicators for the whole level at once, if results are stacked
+    stack = self.stack (mc, positions, self.stacked_indicator)
+    if stack is not None:
+      return numpy.asarray ( self.stacked_indicator (stack), dtype=float ) .reshape (-1)
+
+    # evaluate indicators for each sample
+    return numpy.array ( [ self.indicator (mc.results [i]) for i in positions ] )
+
+  # evaluates level distances for the (loaded) results at the specified positions (w.r.t. 'None' if coarse is not specified)
+  def separate (self, level, fine, coarse, positions):
+
+    # for coarsest level, distance is taken w.r.t. 'None'
+    if coarse == None:
+
+      # evaluate vectorized distances for the whole level at once, if results are stacked
+      stack = self.stack (fine, positions, self.stacked_distance)
+      if stack is not None:
+        return numpy.asarray ( self.stacked_distance (self.coefficients.values [level] * stack, None), dtype=float ) .reshape (-1)
+
+      return numpy.array ( [ self.distance (self.coefficients.values [level] * fine.results [i], None) for i in positions ] )
+
+    # evaluate vectorized distances for the whole level at once, if results are stacked
+    stacks = [ self.stack (fine, positions, self.stacked_distance), self.stack (coarse, positions, self.stacked_distance) ]
+    if stacks [0] is not None and stacks [1] is not None:
+      return numpy.asarray ( self.stacked_distance (self.coefficients.values [level] * stacks [0], self.coefficients.values [level - 1] * stacks [1]), dtype=float ) .reshape (-1)
+
+    return numpy.array ( [ self.distance (self.coefficients.values [level] * fine.results [i], self.coefficients.values [level - 1] * coarse.results [i]) for i in positions ] )
+
+  # evaluates the specified function for the samples at the specified positions of the specified MC simulations (fine and coarse),
+  # reusing the persistent values (of the specified kind and key) of finished samples with the same stamps,
+  # such that results of deferred samples are loaded only if their values are not available;
+  # returns the positions and the values of all samples which remain available
+  def cached (self, kind, key, mcs, positions, function, loading=None):
+
+    incremental = mcs [0] .params.incremental
+    cache   = mcs [0] .recall (self.qois) [kind] if incremental else {}
+    samples = mcs [0] .config.samples
+
+    # persistent values are tagged by the stamps of the samples and by the key
+    tags = [ tuple ( [ mc.stamps [i] for mc in mcs ] ) + key for i in positions ]
+
+    # reuse values of finished samples with the same tags
+    entries = [ cache.get ( samples [i] ) for i in positions ]
+    hits    = numpy.array ( [ entry != None and None not in tag [ : len (mcs) ] and entry [0] == tag for entry, tag in zip (entries, tags) ], dtype=bool )
+
+    values = numpy.empty ( len (positions) )
+    values [hits] = [ entry [1] for entry, hit in zip (entries, hits) if hit ]
+
+    # load deferred results of the remaining samples
+    missing = numpy.flatnonzero (~hits)
+    for mc in mcs:
+      mc.demand ( positions [missing], loading )
+
+    # deferred results which fail to load are no longer available
+    loaded  = numpy.array ( [ all ( [ mc.results [i] != None for mc in mcs ] ) for i in positions [missing] ], dtype=bool )
+    missing = missing [loaded]
+
+    # evaluate the remaining samples
+    if len (missing) > 0:
+      values [missing] = function ( positions [missing] )
+
+    # keep the values of finished samples
+    if incremental:
+      for k in missing:
+        if None not in tags [k] [ : len (mcs) ]:
+          cache [ samples [ positions [k] ] ] = ( tags [k], values [k] )
+
+    available = hits.copy ()
+    available [missing] = 1
+
+    return positions [available], values [available]
+
+  # indicator values of the specified types for the samples at the specified positions,
+  # if distances can be rescaled from them (i.e. a homogeneous distance is declared and all values are available)
+  def rescalable (self, level, types, positions):
+
+    if self.rescale == None:
+      return None
+
+    units = [ self.units [level] [type] for type in types ]
+    if None in units or [ i for i in positions for values in units if i not in values ] != []:
+      return None
+
+    return [ numpy.array ( [ values [i] for i in positions ] ) for values in units ]
+
+  # keep the persistent indicator values of finished samples for the next (incremental) update
+  def memorize (self, mcs):
+
+    for mc in mcs:
+      if mc.params.incremental:
+        mc.memorize (self.qois)
+
+  # positions of the samples with available (loaded or deferred) results in all specified MC simulations,
+  # restricted to the specified indices (if any) using a boolean mask, instead of a membership test for each sample
+  def positions (self, mcs, indices=None):
+
+    count = min ( [ len (mc.results) for mc in mcs ] )
+    mask  = numpy.ones (count, dtype=bool)
+
+    for mc in mcs:
+      mask &= numpy.array ( [ mc.results [i] != None or mc.deferred (i) for i in range (count) ], dtype=bool )
+
+    if indices != None:
+      selected = numpy.zeros (count, dtype=bool)
+      selected [ numpy.array ( [ index for index in indices if index < count ], dtype=int ) ] = 1
+      mask &= selected
+
+    return numpy.flatnonzero (mask)
+
+  # stacked data (samples x elements) of the indicator qoi for the results at the specified positions,
+  # if a vectorized function is available and the results are held in the memory-mapped ensemble store (None otherwise)
+  def stack (self, mc, positions, function):
+
+    if function == None or self.qois == None or len (self.qois) != 1:
+      return None
+
+    return mc.stack (self.qois [0], positions)
+
   # least squares inference of indicator level values based on the magnitudes of measured level values
   def infer (self, indicator, degree=1, log=0, exp=0, offset=0, factor=1, critical=0, min=None, max=None):
 
@@ -0,0 +1,47 @@
+
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+# Batched Gaussian smoothing of multiple channels
+#
+# Jonas Sukys
+# CSE Lab, ETH Zurich, Switzerland
+# sukys.jonas@gmail.com
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+
+import numpy
+from scipy import signal
+
+# cache of Gaussian kernels for each shape and smoothing parameters
+kernels = {}
+
+# normalized Gaussian kernel of the specified dimensions
+# with standard deviation eps relative to the extent of the domain discretized by length cells
+def kernel (length, extent, eps, dimensions):
+
+  key = (length, float (extent), eps, dimensions)
+
+  if key not in kernels:
+
+    deviation = length * eps / float (extent)
+    scaling   = 1.0 / float ( deviation * numpy.sqrt (2 * numpy.pi) )
+    window    = int ( round (2 * deviation) )
+    profile   = scaling * signal.gaussian (window, deviation)
+
+    # tensor product of 1-D profiles for multi-dimensional kernels
+    kernel = profile
+    for dimension in range (1, dimensions):
+      kernel = numpy.multiply.outer (kernel, profile)
+
+    kernels [key] = kernel
+
+  return kernels [key]
+
+# smoothen all channels at once - channels are stacked along the first axis
+# and each channel is convolved (along all remaining axes) with the same kernel
+def smoothen (channels, extent, eps):
+
+  dimensions = channels.ndim - 1
+
+  # the kernel does not extend along the axis of channels
+  stencil = kernel (channels.shape [1], extent, eps, dimensions) [numpy.newaxis]
+
+  return signal.fftconvolve (channels, stencil, mode='same')
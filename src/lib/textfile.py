@@ -0,0 +1,97 @@
+
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+# Fast reader for whitespace-delimited numeric text files
+# with a single header line of column names (e.g. 'statistics.dat')
+#
+# Jonas Sukys
+# CSE Lab, ETH Zurich, Switzerland
+# sukys.jonas@gmail.com
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+
+import numpy
+
+# read the header line (column names) of the file
+def header (path):
+
+  with open (path, 'r') as f:
+    return f.readline () .split ()
+
+# value of a single entry (NaN if it is not numeric)
+def number (entry):
+
+  try:
+    return float (entry)
+  except ValueError:
+    return numpy.nan
+
+# number of (whitespace-delimited) entries in each non-empty line of the text
+def tokens (text):
+
+  characters = numpy.frombuffer (text, dtype=numpy.uint8)
+  if len (characters) == 0:
+    return numpy.empty (0, dtype=int)
+
+  # entries start at non-whitespace characters following whitespace (or the beginning of the text)
+  blank  = numpy.in1d ( characters, numpy.frombuffer (' \t\r\n', dtype=numpy.uint8) )
+  starts = numpy.flatnonzero ( ~ blank & numpy.concatenate ( ( [True], blank [ : -1 ] ) ) )
+
+  # assign entries to lines and skip empty lines
+  breaks = numpy.flatnonzero (characters == ord ('\n'))
+  counts = numpy.bincount ( numpy.searchsorted (breaks, starts), minlength = len (breaks) + 1 )
+  return counts [ counts > 0 ]
+
+# read the file into a float64 2-D array (rows x columns) of the specified columns (None for all columns)
+# columns which are not available in the file are skipped
+# returns the list of names of the loaded columns and the array
+def read (path, columns=None):
+
+  # read the header once and then the whole body at once
+  with open (path, 'r') as f:
+    names = f.readline () .split ()
+    body  = f.read ()
+
+  width = len (names)
+  if width == 0:
+    return [], numpy.empty ( (0, 0) )
+
+  # parse the whole body in bulk
+  values = numpy.fromstring (body, dtype=numpy.float64, sep=' ')
+
+  # number of entries in each (non-empty) row
+  counts = tokens (body)
+  total  = numpy.sum (counts)
+
+  # truncate the (possibly incomplete) last row of a file which is still being written
+  if len (counts) > 0 and counts [-1] < width:
+    counts = counts [ : -1 ]
+  rows = len (counts)
+
+  # all entries are numeric and all rows are complete: values are aligned with the columns
+  if len (values) == total and numpy.all (counts == width):
+    data = values [ : rows * width ] .reshape (rows, width)
+
+  # otherwise (rows of different lengths or entries which are not numeric): fall back to the generic (slow) reader,
+  # keeping only the rows with all columns and marking entries which are not numeric as NaN
+  else:
+    rows = [ line.split () for line in body.splitlines () ]
+    rows = [ [ number (entry) for entry in row ] for row in rows if len (row) == width ]
+    data = numpy.array (rows, dtype=numpy.float64) if len (rows) > 0 else numpy.empty ( (0, width) )
+
+  # header-name index
+  index = dict ( (name, column) for column, name in enumerate (names) )
+
+  # select the specified columns
+  if columns != None:
+    names = [ name for name in columns if name in index ]
+    data  = data [ :, [ index [name] for name in names ] ]
+
+  return names, data
+
+# read the file into a dictionary of columns of the specified names (None for all columns)
+# columns are stored in a single contiguous block (one row per column)
+def records (path, columns=None):
+
+  names, data = read (path, columns)
+  block = numpy.ascontiguousarray (data.T)
+
+  return dict ( (name, block [column]) for column, name in enumerate (names) )
@@ -15,12 +15,151 @@ import os
 import sys
 import math
 import copy
+import cPickle
+import cStringIO
+import numpy
 
 # === local imports
 
 from helpers import intf, pair, Progress
+from stats import Stat, evaluate, select
 import local
 
+# === parallel loading
+
+# solver used by the loading workers (inherited by the forked worker processes)
+loader = None
+
+# pool of loading workers, which can be shared by the loading of several MC simulations:
+# the pool is created on first use and needs to be closed after the loading
+class Loading (object):
+
+  def __init__ (self, solver, workers):
+
+    self.solver  = solver
+    self.workers = workers
+    self.pool    = None
+
+  # get the pool of loading workers, creating it if needed
+  def get (self):
+
+    if self.pool == None:
+
+      import multiprocessing
+
+      # workers inherit the solver when the pool is forked
+      global loader
+      loader = self.solver
+
+      self.pool = multiprocessing.Pool (self.workers)
+
+    return self.pool
+
+  # close the pool of loading workers, after all results are loaded
+  def close (self):
+
+    global loader
+
+    if self.pool != None:
+      self.pool.close ()
+      self.pool.join ()
+      self.pool = None
+      loader = None
+
+  # terminate the pool of loading workers, if loading fails
+  def terminate (self):
+
+    global loader
+
+    if self.pool != None:
+      self.pool.terminate ()
+      self.pool.join ()
+      self.pool = None
+      loader = None
+
+# load the results of a single sample (executed by the loading workers)
+def load_sample (task):
+
+  level, type, sample, qois, verbose = task
+
+  if verbose >= 2:
+    return loader.load ( level, type, sample, qois )
+  else:
+    try:
+      return loader.load ( level, type, sample, qois )
+    except:
+      return None
+
+# === parallel assembly
+
+# MC simulations, statistics and qois used by the assembling workers (inherited by the forked worker processes)
+assembler = None
+
+# assemble the estimates of a single MC simulation (executed by the assembling workers)
+def assemble_mc (task):
+
+  position, indices = task
+  mcs, stats, qois = assembler
+
+  # output (e.g. progress, folding and verbosity messages) is captured and printed by the parent process
+  stdout = sys.stdout
+  sys.stdout = cStringIO.StringIO ()
+  try:
+    mcs [position] .assemble (stats, indices, qois)
+    output = sys.stdout.getvalue ()
+  finally:
+    sys.stdout = stdout
+
+  # only the output and the data of the estimates is sent back
+  return output, [ ( stat.available, stat.estimate.data if stat.available else None, stat.states ) for stat in mcs [position] .stats ]
+
+# assemble the estimates of the specified MC simulations concurrently using a pool of worker processes
+# tasks are pairs of positions of MC simulations and indices of samples to be used
+def assemble_parallel (mcs, stats, qois, tasks, workers):
+
+  import multiprocessing
+
+  # workers inherit the loaded results when the pool is forked
+  global assembler
+  assembler = (mcs, stats, qois)
+
+  pool = multiprocessing.Pool (workers)
+  try:
+    for step, (output, estimates) in enumerate ( pool.imap (assemble_mc, tasks) ):
+      position, indices = tasks [step]
+      sys.stdout.write (output)
+      sys.stdout.flush ()
+      mcs [position] .install (stats, indices, estimates)
+    pool.close ()
+  except:
+    pool.terminate ()
+    raise
+  finally:
+    pool.join ()
+    assembler = None
+
+# === loaded qois
+
+# check if results loaded for the specified qois (None for all qois) include all of the requested qois
+def covers (loaded, requested):
+
+  if loaded == None:
+    return 1
+
+  if requested == None:
+    return 0
+
+  return set (requested) <= set (loaded)
+
+# === folded statistics
+
+# check if the estimates of the statistic can be folded (statistics with a specialized evaluation are not folded)
+def foldable (stat):
+
+  specialized = type (stat) .evaluate.im_func is not Stat.evaluate.im_func
+
+  return stat.online and stat.mergeable and not specialized
+
 # === classes
 
 # configuration class for MC simulations
@@ -44,9 +183,32 @@ class MC (object):
     
     # list of results
     self.results = [ None ] * len ( self.config.samples )
+
+    # modification times of the status files of finished samples at the time their results were loaded
+    self.stamps = [ None ] * len ( self.config.samples )
+
+    # whether new results of finished samples were loaded
+    self.changed = 0
     
     # dictionary of stats
     self.stats = {}
+
+    # file for the persistent cache of loaded results
+    self.cachefile = 'results.cache'
+
+    # loaded qois (None if all qois are loaded)
+    self.qois = None
+
+    # memory-mapped store of the loaded results (opened on first load, if enabled)
+    self.ensemble = None
+
+    # file for the persistent sufficient statistics of assembled estimates (for incremental assembly)
+    self.foldsfile = 'stats.cache'
+    self.folds     = None
+
+    # file for the persistent indicator values of finished samples (for incremental updates)
+    self.indicationsfile = 'indicators.cache'
+    self.indications     = None
   
   # validate all samples
   def validate (self): 
@@ -153,11 +315,23 @@ class MC (object):
     config = self.config
     return sum ( [ not config.solver.finished ( config.level, config.type, sample ) for sample in config.samples ] )
 
-  # check if some loaded results are invalid
-  def invalid (self):
+  # check if some loaded results (at the specified positions, all by default) are invalid
+  def invalid (self, positions=None):
+
+    if positions == None:
+      positions = range (len (self.results))
+
+    invalid = [ ( ( self.results [i] .invalid () or self.config.solver.invalid (self.results [i]) ) if self.results [i] != None else 0 ) for i in positions ]
+    indices = [ i for i, status in zip (positions, invalid) if status ]
+
+    # invalid results are always reloaded
+    for i in indices:
+      self.stamps [i] = None
+      if self.ensemble != None:
+        self.ensemble.discard ( self.config.samples [i] )
 
-    invalid = [ ( ( result.invalid () or self.config.solver.invalid (result) ) if result != None else 0) for result in self.results ]
-    indices = [ i for i, status in enumerate (invalid) if status ]
+    if self.ensemble != None:
+      self.ensemble.flush ()
 
     return indices
 
@@ -234,8 +408,234 @@ class MC (object):
     else:
       return { 'min' : None, 'max' : None }
 
-  # load the results
-  def load (self):
+  # number of worker processes for loading the results
+  def workers (self):
+
+    if self.params.workers != None:
+      return self.params.workers
+    else:
+      return getattr (local, 'workers', 1)
+
+  # key identifying the configuration of the loaded results
+  def key (self):
+
+    dataclass = getattr (self.config.solver, 'dataclass', None)
+    if hasattr (dataclass, 'params'):
+      return dataclass.params ()
+    else:
+      return None
+
+  # path to the persistent cache of loaded results
+  def cachepath (self):
+
+    return os.path.join ( self.config.solver.directory (self.config.level, self.config.type), self.cachefile )
+
+  # keep the results of finished samples from a previously loaded MC simulation
+  def inherit (self, mc):
+
+    positions = dict ( (sample, i) for i, sample in enumerate (mc.config.samples) )
+    for i, sample in enumerate (self.config.samples):
+      if sample in positions and mc.stamps [ positions [sample] ] != None:
+        self.results [i] = mc.results [ positions [sample] ]
+        self.stamps  [i] = mc.stamps  [ positions [sample] ]
+
+    self.qois = mc.qois
+
+  # read the persistent cache of results of finished samples (None if not available),
+  # which is keyed by the configuration and by the loaded qois (None for all qois)
+  # returns the loaded qois and the results of finished samples
+  def cached (self):
+
+    path = self.cachepath ()
+    if not os.path.exists (path):
+      return None
+
+    try:
+      with open (path, 'rb') as f:
+        key, cache = cPickle.load (f)
+    except:
+      return None
+
+    # cache was created using a different configuration
+    if key [0] != self.key ():
+      return None
+
+    return key [1], cache
+
+  # restore the results of finished samples from the persistent cache, if they include all of the specified qois
+  def restore (self, qois=None):
+
+    cached = self.cached ()
+    if cached == None or not covers (cached [0], qois):
+      return
+
+    self.qois, cache = cached
+
+    for i, sample in enumerate (self.config.samples):
+      if sample in cache:
+        stamp, result = cache [sample]
+
+        # data held in the memory-mapped store is not cached, but referenced by views of the corresponding rows
+        stored = [ qoi for qoi, values in getattr (result, 'data', {}) .iteritems () if values is None ]
+        if stored != []:
+          rows = [ self.ensemble.row (sample, qoi) if self.ensemble != None else None for qoi in stored ]
+          if [ row for row in rows if row is None ] != []:
+            continue
+          result.data.update ( zip (stored, rows) )
+
+        self.stamps [i], self.results [i] = stamp, result
+        if len (stored) < len (getattr (result, 'data', {None : None})):
+          self.archive (i)
+
+  # result at the specified position to be cached, where the data held in the memory-mapped store is replaced by None
+  def stored (self, i):
+
+    result = self.results [i]
+    if self.ensemble == None or not hasattr (result, 'data'):
+      return result
+
+    sample = self.config.samples [i]
+    stored = [ qoi for qoi in result.data if self.ensemble.row (sample, qoi) is not None ]
+    if stored == []:
+      return result
+
+    skeleton = copy.copy (result)
+    skeleton.data = dict ( (qoi, None if qoi in stored else values) for qoi, values in result.data.iteritems () )
+    return skeleton
+
+  # store the results of finished samples to the persistent cache
+  def store (self):
+
+    if not self.changed:
+      return
+
+    # data held in the memory-mapped store is written to disk there
+    if self.ensemble != None:
+      self.ensemble.flush ()
+
+    cache = dict ( (sample, (self.stamps [i], self.stored (i))) for i, sample in enumerate (self.config.samples) if self.stamps [i] != None and self.results [i] != None )
+
+    # deferred results are not loaded, hence their previously cached entries (with the same stamps) are kept
+    deferred = [ i for i in range (len (self.results)) if self.deferred (i) ]
+    if deferred != []:
+      previous = self.cached ()
+      previous = previous [1] if previous != None and covers (previous [0], self.qois) else {}
+      for i in deferred:
+        sample = self.config.samples [i]
+        if sample in previous and previous [sample] [0] == self.stamps [i]:
+          cache [sample] = previous [sample]
+
+    # write to a temporary file first, such that an interrupted save does not corrupt the cache
+    path = self.cachepath ()
+    temporary = path + '.tmp'
+    try:
+      with open (temporary, 'wb') as f:
+        cPickle.dump ( ( (self.key (), self.qois), cache ), f, cPickle.HIGHEST_PROTOCOL )
+      os.rename (temporary, path)
+    except:
+      if os.path.exists (temporary):
+        os.remove (temporary)
+
+    self.changed = 0
+
+  # open the memory-mapped store of the loaded results, if enabled
+  def open (self):
+
+    if self.ensemble == None and getattr (self.config.mlmc_config, 'ensemble', 0):
+      from ensemble import Ensemble
+      dtype = getattr ( getattr (self.config.solver, 'dataclass', None), 'dtype', None )
+      self.ensemble = Ensemble ( self.config.solver.directory (self.config.level, self.config.type), dtype if dtype != None else numpy.float64 )
+
+      # reserve rows for all samples at once
+      if len (self.config.samples) > 0 and max (self.config.samples) >= self.ensemble.capacity:
+        self.ensemble.reserve ( max (self.config.samples) + 1 )
+
+  # move the loaded results at the specified position into the memory-mapped store, if enabled
+  def archive (self, i):
+
+    if self.ensemble != None and self.results [i] != None:
+      self.ensemble.store ( self.config.samples [i], self.results [i] )
+
+  # stacked data (samples x data shape) of the specified qoi for the results at the specified positions,
+  # if all of them are held in the memory-mapped store (None otherwise):
+  # a (zero-copy) view if the rows of the samples are contiguous, a copy otherwise (unless 'view' is set)
+  def stack (self, qoi, positions, view=0):
+
+    if self.ensemble == None or qoi not in self.ensemble.shapes or len (positions) == 0:
+      return None
+
+    rows = numpy.array ( [ self.config.samples [i] for i in positions ], dtype=int )
+
+    if rows.min () < 0 or rows.max () >= self.ensemble.capacity or not self.ensemble.valid [qoi] [rows] .all ():
+      return None
+
+    # contiguous rows are sliced
+    if ( numpy.diff (rows) == 1 ) .all ():
+      return self.ensemble [qoi] [ rows [0] : rows [-1] + 1 ]
+
+    if view:
+      return None
+
+    return self.ensemble [qoi] [rows]
+
+  # load the results of the samples at the specified positions, restricted to the specified qois (None loads all qois)
+  # the specified pool of loading workers (shared with other MC simulations) is used, if provided
+  def fetch (self, positions, qois, progress=None, offset=0, loading=None):
+
+    config = self.config
+
+    self.open ()
+
+    # number of worker processes
+    workers = min ( self.workers (), len (positions) )
+
+    # parallel loading using a pool of worker processes (results are collected in the order of samples)
+    if workers > 1:
+
+      # unless a shared pool is provided, a pool is created only for these samples
+      shared = loading != None
+      if not shared:
+        loading = Loading (config.solver, workers)
+
+      tasks     = [ ( config.level, config.type, config.samples [i], qois, self.params.verbose ) for i in positions ]
+      chunksize = max ( 1, len (tasks) / (4 * workers) )
+
+      try:
+        for step, result in enumerate ( loading.get () .imap (load_sample, tasks, chunksize) ):
+          self.results [ positions [step] ] = result
+          self.archive ( positions [step] )
+          if progress != None:
+            progress.update (offset + step + 1)
+      except:
+        loading.terminate ()
+        raise
+      finally:
+        if not shared:
+          loading.close ()
+
+    # serial loading
+    else:
+
+      for step, i in enumerate (positions):
+        sample = config.samples [i]
+        if self.params.verbose >= 2:
+          self.results [i] = config.solver.load ( config.level, config.type, sample, qois )
+        else:
+          try:
+            self.results [i] = config.solver.load ( config.level, config.type, sample, qois )
+          except:
+            self.results [i] = None
+        self.archive (i)
+        if progress != None:
+          progress.update (offset + step + 1)
+
+    if self.ensemble != None:
+      self.ensemble.flush ()
+
+  # load the results (only the specified qois, if the dataclass supports projection)
+  # in lazy mode, finished samples with unchanged persistent indicator values are deferred, i.e. loaded only on demand
+  # the specified pool of loading workers (shared with other MC simulations) is used, if provided
+  def load (self, qois=None, lazy=0, loading=None):
     
     config = self.config
 
@@ -243,31 +643,384 @@ class MC (object):
     progress = Progress (prefix=prefix, steps=len(config.samples), length=33)
     progress.init ()
 
-    for i, sample in enumerate (config.samples):
-      if self.params.verbose >= 2:
-        self.results [i] = config.solver.load ( config.level, config.type, sample )
-      else:
-        try:
-          self.results [i] = config.solver.load ( config.level, config.type, sample )
-        except:
-          self.results [i] = None
-      progress.update (i + 1)
+    # samples with deferred results
+    deferred = set ()
+
+    # in incremental mode, results of finished samples that did not change since they were loaded are reused
+    if self.params.incremental:
+
+      stamps = [ config.solver.stamp (config.level, config.type, sample) for sample in config.samples ]
+
+      # finished samples with persistent indicator values of the same stamps are deferred
+      if lazy and self.indications != None:
+        values   = self.indications ['values']
+        deferred = set ( [ i for i, sample in enumerate (config.samples) if stamps [i] != None and sample in values and values [sample] [0] [0] == stamps [i] ] )
+
+      # if no results were inherited, restore them from the persistent cache (unless all finished samples are deferred)
+      if self.stamps.count (None) == len (self.stamps) and len (deferred) < len (stamps) - stamps.count (None):
+        self.open ()
+        self.restore (qois)
+
+      # previously loaded results which do not include all specified qois are reloaded
+      complete = covers (self.qois, qois)
+
+      positions = [ i for i in range (len (config.samples)) if i not in deferred and ( not complete or self.results [i] == None or stamps [i] == None or stamps [i] != self.stamps [i] ) ]
+
+    # otherwise, all samples are loaded
+    else:
+
+      stamps    = [ None ] * len (config.samples)
+      positions = range (len (config.samples))
+
+    # reused results are already available
+    offset = len (config.samples) - len (positions)
+    progress.update (offset)
+
+    # load remaining results
+    self.fetch (positions, qois, progress, offset, loading)
+    self.qois = qois
 
     progress.reset ()
+
+    # record which samples were finished at the time their results were loaded
+    for i in positions:
+      self.stamps [i] = stamps [i] if self.results [i] != None else None
+      if self.stamps [i] != None:
+        self.changed = 1
+
+    # previously loaded results of deferred samples are kept only if they did not change
+    for i in deferred:
+      if self.stamps [i] != stamps [i]:
+        self.results [i] = None
+      self.stamps [i] = stamps [i]
     
-    loaded = [ i for i, result in enumerate (self.results) if result != None ]
+    loaded = [ i for i, result in enumerate (self.results) if result != None or self.deferred (i) ]
     
     self.available = (len (loaded) > 0)
 
     return loaded
+
+  # check if the result of the sample at the specified position is deferred (finished, but not loaded yet)
+  def deferred (self, i):
+
+    return self.results [i] == None and self.stamps [i] != None
+
+  # load the deferred results of the samples at the specified positions
+  def demand (self, positions, loading=None):
+
+    positions = [ i for i in positions if self.deferred (i) ]
+    if positions == []:
+      return
+
+    self.fetch (positions, self.qois, loading=loading)
+
+    # deferred samples which fail to load are no longer available
+    for i in positions:
+      if self.results [i] == None:
+        self.stamps [i] = None
+      else:
+        self.changed = 1
+
+  # make sure that the specified qois (None for all qois) are loaded for all available results,
+  # including deferred results (unless lazy, i.e. if they are demanded individually, as for the indicators)
+  # the specified pool of loading workers (shared with other MC simulations) is used, if provided
+  # returns positions of the reloaded results which are invalid (checked for all loaded qois)
+  def require (self, qois=None, lazy=0, loading=None):
+
+    # requested qois are already loaded (or not available at all)
+    if self.qois == None or ( qois != None and set (qois) <= set (self.qois) ):
+      positions = []
+
+    # available results with missing qois (extending the loaded projection)
+    else:
+
+      if qois != None:
+        qois = list ( set (self.qois) | set (qois) )
+
+      if qois == None:
+        positions = [ i for i, result in enumerate (self.results) if result != None ]
+      else:
+        positions = [ i for i, result in enumerate (self.results) if result != None and [ qoi for qoi in qois if qoi not in result.data ] != [] ]
+
+      self.qois = qois
+
+    # deferred results
+    deferred = [ i for i in range (len (self.results)) if self.deferred (i) ] if not lazy else []
+
+    if len (positions) + len (deferred) == 0:
+      return []
+
+    config = self.config
+
+    prefix = '  :      %d  |  %s  |    %s  | ' % (config.level, [' FINE ', 'COARSE'] [config.type], intf(len(positions) + len(deferred), table=1))
+    progress = Progress (prefix=prefix, steps=len(positions) + len(deferred), length=33)
+    progress.init ()
+
+    self.fetch (positions + deferred, self.qois, progress, loading=loading)
+
+    progress.finalize ()
+
+    # deferred samples which fail to load are no longer available
+    for i in deferred:
+      if self.results [i] == None:
+        self.stamps [i] = None
+
+    # reloaded results are checked again, since the additional qois might be invalid (these results are reloaded next time)
+    invalid = self.invalid (positions + deferred)
+
+    # reloaded results of finished samples need to be stored again
+    if [ i for i in positions + deferred if self.stamps [i] != None ] != []:
+      self.changed = 1
+
+    # update the persistent cache of loaded results
+    if self.params.incremental:
+      self.store ()
+
+    return invalid
   
   # assmble MC estimates
-  def assemble (self, stats, indices, qois):
+  # partial estimates from disjoint subsets of samples (e.g. computed in parallel or in earlier iterations) are merged, if specified
+  def assemble (self, stats, indices, qois, partials=[]):
 
     print '  : -> level %d, type %d' % (self.config.level, self.config.type)
 
-    self.stats = copy.deepcopy (stats)
-    
-    # assemble MC estimates using only specified subset of all samples
+    self.stats = [ stat.clone () for stat in stats ]
     for stat in self.stats:
-      stat.evaluate ( self.results, indices=indices, qois=qois )
+      stat.mclevel = self.config.level
+
+    # compute indices, if not explicitely specified
+    if indices == None:
+      indices = [ index for index, result in enumerate (self.results) if result != None ]
+
+    # in incremental mode, previously assembled sufficient statistics are updated with new samples only
+    if self.params.incremental:
+      remaining = self.fold (indices, qois)
+    else:
+      remaining = self.stats
+    
+    # assemble MC estimates using only specified subset of all samples (single pass over all samples for all statistics)
+    # stacked ensembles of the results held in the memory-mapped store are (zero-copy) views
+    stacks = lambda qoi : self.stack (qoi, indices, view=1)
+    evaluate ( remaining, self.results, indices=indices, qois=qois, stacks=stacks )
+
+    # keep sufficient statistics of the assembled estimates for the next assembly
+    if self.params.incremental:
+      self.record (remaining, indices, qois)
+
+    # merge partial estimates
+    self.reduce (partials)
+
+  # path to the persistent sufficient statistics of assembled estimates
+  def foldspath (self):
+
+    return os.path.join ( self.config.solver.directory (self.config.level, self.config.type), self.foldsfile )
+
+  # restore the persistent sufficient statistics of assembled estimates
+  # for each statistic and qois: states of all qois and stamps of all samples folded into them
+  def unfold (self):
+
+    if self.folds != None:
+      return self.folds
+
+    self.folds = {}
+
+    path = self.foldspath ()
+    if not os.path.exists (path):
+      return self.folds
+
+    try:
+      with open (path, 'rb') as f:
+        key, folds = cPickle.load (f)
+    except:
+      return self.folds
+
+    # cache was created using a different configuration
+    if key == self.key ():
+      self.folds = folds
+
+    return self.folds
+
+  # key of the persistent sufficient statistics of a statistic for the specified qois
+  def foldkey (self, stat, qois):
+
+    return ( stat.identity (), repr (qois) )
+
+  # incremental assembly of mergeable online statistics:
+  # newly loaded samples are folded into previously assembled sufficient statistics,
+  # and samples which are no longer used are removed (if supported by the statistic)
+  # returns statistics which need to be assembled from scratch
+  def fold (self, indices, qois):
+
+    folds = self.unfold ()
+
+    # keys are computed before the statistics are evaluated
+    self.foldkeys = [ self.foldkey (stat, qois) for stat in self.stats ]
+
+    # stamps of the samples to be used - unfinished samples can not be folded persistently
+    stamps = dict ( ( self.config.samples [i], self.stamps [i] ) for i in indices )
+    if None in stamps.values ():
+      return self.stats
+
+    positions = dict ( (sample, i) for i, sample in enumerate (self.config.samples) )
+
+    remaining = []
+    for stat, key in zip (self.stats, self.foldkeys):
+
+      if not foldable (stat) or key not in folds:
+        remaining.append (stat)
+        continue
+
+      states, folded = folds [key]
+
+      # samples which were modified since they were folded can not be removed
+      added   = [ sample for sample in stamps if sample not in folded ]
+      removed = [ sample for sample in folded if sample not in stamps ]
+      changed = [ sample for sample in folded if sample in stamps and stamps [sample] != folded [sample] ]
+
+      # samples to be removed need to be available
+      unavailable = [ sample for sample in removed if sample not in positions or self.results [ positions [sample] ] == None ]
+
+      if changed != [] or ( removed != [] and ( not stat.removable or unavailable != [] ) ):
+        remaining.append (stat)
+        continue
+
+      # check availability and setup the estimate
+      if not stat.setup (self.results, indices):
+        continue
+
+      names, extents = select (stat.estimate, qois)
+      separable = 1
+      for qoi, extent in zip (names, extents):
+
+        if qoi not in states:
+          continue
+
+        accumulator = stat.accumulator ()
+        accumulator.restore (states [qoi])
+
+        # fold in new samples
+        for sample in added:
+          accumulator.update (self.results [ positions [sample] ] [qoi], extent)
+
+        # remove samples which are no longer used
+        if removed != []:
+          complement = stat.accumulator ()
+          complement.init ()
+          for sample in removed:
+            complement.update (self.results [ positions [sample] ] [qoi], extent)
+
+          # estimates which would differ from an assembly of the remaining samples (e.g. adaptive ranges) are assembled from scratch
+          if not accumulator.separable (complement.state ()):
+            separable = 0
+            break
+
+          accumulator.separate (complement.state ())
+
+        stat.estimate [qoi] = accumulator.result ()
+        stat.states   [qoi] = accumulator.state ()
+
+      if not separable:
+        remaining.append (stat)
+        continue
+
+      print '       %-30s[%s]' % (stat.name, 'folded %d new, removed %d' % ( len (added), len (removed) ))
+
+    return remaining
+
+  # keep sufficient statistics of the assembled mergeable estimates for the next (incremental) assembly
+  def record (self, remaining, indices, qois):
+
+    folds = self.unfold ()
+
+    stamps = dict ( ( self.config.samples [i], self.stamps [i] ) for i in indices )
+    if None in stamps.values ():
+      return
+
+    for stat, key in zip (self.stats, self.foldkeys):
+      if foldable (stat) and stat.available:
+        folds [key] = ( copy.deepcopy (stat.states), stamps )
+
+    # write to a temporary file first, such that an interrupted save does not corrupt the cache
+    path = self.foldspath ()
+    temporary = path + '.%d.tmp' % os.getpid ()
+    try:
+      with open (temporary, 'wb') as f:
+        cPickle.dump ( (self.key (), folds), f, cPickle.HIGHEST_PROTOCOL )
+      os.rename (temporary, path)
+    except:
+      if os.path.exists (temporary):
+        os.remove (temporary)
+
+  # path to the persistent indicator values of finished samples
+  def indicationspath (self):
+
+    return os.path.join ( self.config.solver.directory (self.config.level, self.config.type), self.indicationsfile )
+
+  # restore the persistent indicator values of finished samples, computed for the specified indicator qois:
+  # for each sample, the indicator value ('values') and the level distance ('distances', for the fine type only),
+  # each tagged by the stamps of the sample (of both types for distances) followed by the coefficients used
+  def recall (self, qois=None):
+
+    if self.indications != None:
+      return self.indications
+
+    self.indications = { 'values' : {}, 'distances' : {} }
+
+    path = self.indicationspath ()
+    if not os.path.exists (path):
+      return self.indications
+
+    try:
+      with open (path, 'rb') as f:
+        key, indications = cPickle.load (f)
+    except:
+      return self.indications
+
+    # cache was created using a different configuration
+    if key == ( self.key (), repr (qois) ):
+      self.indications = indications
+
+    return self.indications
+
+  # keep the indicator values of finished samples for the next (incremental) update
+  def memorize (self, qois=None):
+
+    if self.indications == None:
+      return
+
+    # write to a temporary file first, such that an interrupted save does not corrupt the cache
+    path = self.indicationspath ()
+    temporary = path + '.tmp'
+    try:
+      with open (temporary, 'wb') as f:
+        cPickle.dump ( ( ( self.key (), repr (qois) ), self.indications ), f, cPickle.HIGHEST_PROTOCOL )
+      os.rename (temporary, path)
+    except:
+      if os.path.exists (temporary):
+        os.remove (temporary)
+
+  # install MC estimates assembled by a worker process
+  def install (self, stats, indices, estimates):
+
+    self.stats = [ stat.clone () for stat in stats ]
+
+    # compute indices, if not explicitely specified
+    if indices == None:
+      indices = [ index for index, result in enumerate (self.results) if result != None ]
+
+    for stat, (available, data, states) in zip (self.stats, estimates):
+
+      stat.available = available
+      stat.states    = states
+
+      # data class (and shared meta data) of the estimate is taken from the first valid sample (as in Stat.setup)
+      if available:
+        stat.estimate      = copy.copy ( self.results [ indices [0] ] )
+        stat.estimate.data = data
+
+  # merge partial estimates (lists of stats) from disjoint subsets of samples into the MC estimates
+  def reduce (self, partials):
+
+    for partial in partials:
+      for stat, other in zip (self.stats, partial):
+        stat.merge (other)
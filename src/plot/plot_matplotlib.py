@@ -761,6 +761,8 @@ class MatPlotLib (object):
         # special plotting for multi-dimensional statistics (e.g. histograms, correlations)
         if stat.size > 2:
           if stat.name == 'histogram':
+            if stat_extent == None and qoi in getattr (stat, 'ranges', {}):
+              stat_extent = stat.ranges [qoi]
             if stat_extent != None:
               self.histogram (qoi, stat, stat_extent, centered, line)
             else:
@@ -1133,6 +1135,9 @@ class MatPlotLib (object):
     
     if not qoi: qoi = self.mlmc.config.solver.qoi
 
+    # make sure that the qoi is loaded
+    self.mlmc.require ([qoi])
+
     print ' :: INFO: Plotting sample %d of \'%s\' for level %d and type %d...' % (sample, qoi, level, type),
     sys.stdout.flush()
 
@@ -1315,6 +1320,9 @@ class MatPlotLib (object):
     
     if not qoi: qoi = self.mlmc.config.solver.qoi
 
+    # make sure that the qoi is loaded
+    self.mlmc.require ([qoi])
+
     print ' :: INFO: Plotting ensemble of \'%s\' for level %d and type %d (limit set to %d)...' % (qoi, level, type, limit),
     sys.stdout.flush()
 
@@ -1379,6 +1387,9 @@ class MatPlotLib (object):
 
     if not qoi: qoi = self.mlmc.config.solver.qoi
 
+    # make sure that the qoi is loaded
+    self.mlmc.require ([qoi])
+
     print ' :: INFO: Plotting ensembles of \'%-20s\' for all levels (limit set to %d)...' % (qoi, limit),
     sys.stdout.flush()
     
@@ -2037,6 +2048,9 @@ class MatPlotLib (object):
 
     import rp
 
+    # make sure that the radius is loaded
+    self.mlmc.require (['Req'])
+
     if r == None:
       r = numpy.array ( self.mlmc.mcs [ self.mlmc.config.pick [self.mlmc.config.L] [0] ] .results [0] .data ['Req'] ) [0]
       if count != 1:
@@ -2116,11 +2130,61 @@ class MatPlotLib (object):
     ax.autoscale_view ()
     ax.invert_yaxis ()
 
+  # plot MLMC estimates of correlations (or covariances) between different qois for the specified element (e.g. time point)
+  def covariance (self, stat, element=-1, hinton=True, infolines=False, save=None):
+
+    print ' :: INFO: Plotting %s...' % stat.name,
+    sys.stdout.flush()
+
+    if not stat.available:
+      self.mlmc.helpers.warning ('Statistic \'%s\' is not available' % stat.name)
+      return
+
+    qois   = stat.qois
+    matrix = stat.matrix (element)
+
+    pylab.figure ( figsize = (8, 8) )
+
+    # plot Hinton diagram
+    if hinton:
+      self.hinton (matrix)
+      pylab.minorticks_off()
+      pylab.gca().tick_params ( labelleft='on', labelright='off', labelbottom='off',labeltop='on' )
+      pylab.gca().set_xticks ( numpy.arange ( len (qois) ) )
+      pylab.gca().set_yticks ( numpy.arange ( len (qois) ) )
+      pylab.gca().set_xticklabels ( [' ' + name (qoi, short=True) for qoi in qois], rotation='vertical')
+      pylab.gca().set_yticklabels ( [name (qoi, short=True) + ' ' for qoi in qois] )
+
+    # plot conventional matrix
+    else:
+      pylab.pcolor (matrix)
+      pylab.axis ('equal')
+      pylab.xlim ( [0, len (qois)] )
+      pylab.ylim ( [0, len (qois)] )
+      pylab.xticks ( 0.5 + numpy.arange ( len (qois) ), qois )
+      pylab.yticks ( 0.5 + numpy.arange ( len (qois) ), qois )
+      pylab.colorbar ()
+
+    if infolines:
+      show_info(self)
+
+    pylab.subplots_adjust (bottom=0.05)
+    pylab.subplots_adjust (right=0.95)
+    pylab.subplots_adjust (left=0.20)
+    pylab.subplots_adjust (top=0.80)
+
+    self.draw (save, suffix=stat.name.replace (' ', '_'))
+
+    print 'done.'
+
   '''
   # plot correlations between different qois
   def correlations (self, qois=None, hinton=True, infolines=False, save=None):
     
     if qois == None: qois = [ self.mlmc.config.solver.qoi ]
+
+    # make sure that all qois are loaded
+    self.mlmc.require (qois)
     
     level  = 'finest'
     type   = 0
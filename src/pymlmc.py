@@ -58,14 +58,19 @@ class MLMC (object):
     # setup samples
     self.config.samples.setup ( self.config.levels, self.config.works, self.params.tolerate, self.config.recycle )
 
-    # indicators
-    self.indicators = Indicators ( self.config.solver.indicator, self.config.solver.distance, self.config.levels, self.config.levels_types, self.config.pick, self.config.FINE, self.config.COARSE, self.config.works, self.config.samples.pairworks, self.config.recycle, inference = self.config.inference, enforce = self.config.enforce, ocv = self.config.ocv )
+    # qois required by the indicators (None for all qois)
+    qois = [ self.config.solver.qoi ] if hasattr (self.config.solver, 'qoi') else None
+
+    self.indicators = Indicators ( self.config.solver.indicator, self.config.solver.distance, self.config.levels, self.config.levels_types, self.config.pick, self.config.FINE, self.config.COARSE, self.config.works, self.config.samples.pairworks, self.config.recycle, inference = self.config.inference, enforce = self.config.enforce, ocv = self.config.ocv, qois = qois, stacked_indicator = getattr (self.config.solver, 'stacked_indicator', None), stacked_distance = getattr (self.config.solver, 'stacked_distance', None), rescale = getattr (self.config.solver, 'rescale', None) )
     
     # errors
     self.errors = Errors (self.config.levels, self.config.recycle)
 
     # availability
     self.available = 0
+
+    # MC simulations with loaded results
+    self.loaded = []
     
     # default file names
     self.submission_file = 'queue.dat'
@@ -157,19 +162,26 @@ class MLMC (object):
     # loop over simulation iterations
     while True:
 
-      # load MLMC simulation
-      self.load ()
+      # pool of loading workers shared by all levels and types, also for the results demanded by the indicators
+      loading = Loading (self.config.solver, self.mcs [0] .workers ())
+
+      # load MLMC simulation (results which are not needed to update the indicators are loaded only on demand)
+      self.load (lazy=1, loading=loading)
 
       # deterministic simulations are not suppossed to be updated
       if self.config.deterministic:
+        loading.close ()
         return
 
       # compute and report error indicators
-      self.indicators.compute (self.mcs, self.config.samples.indices.loaded, self.L0)
+      self.indicators.compute (self.mcs, self.config.samples.indices.loaded, self.L0, loading)
       self.indicators.report  ()
 
       # optimize and report error indicators
-      self.indicators.optimize (self.mcs, self.config.samples.indices.loaded, self.L0)
+      self.indicators.optimize (self.mcs, self.config.samples.indices.loaded, self.L0, loading=loading)
+
+      # all results required by the indicators are loaded
+      loading.close ()
 
       # save error indicators
       self.indicators.save (self.config.iteration)
@@ -629,7 +641,8 @@ class MLMC (object):
       self.config.samples.save (self.config.iteration)
   
   # load MLMC simulation
-  def load (self):
+  # in lazy (incremental) mode, results of finished samples with persistent indicator values are loaded only on demand
+  def load (self, lazy=0, loading=None):
     
     # load status of MLMC simulation
     if self.params.verbose:
@@ -659,6 +672,13 @@ class MLMC (object):
 
     # recreate MC simulations
     self.create_MCs (self.config.samples.indices.combined, self.config.iteration)
+
+    # in incremental mode, keep the results of finished samples from the previous iteration
+    if self.params.incremental:
+      for mc in self.mcs:
+        for previous in self.loaded:
+          if previous.config.level == mc.config.level and previous.config.type == mc.config.type:
+            mc.inherit (previous)
     
     # if non-interactive session -> wait for jobs to finish
     if not self.params.interactive:
@@ -689,6 +709,10 @@ class MLMC (object):
     # buffer
     buffer = ''
 
+    # pool of loading workers shared by all levels and types (unless provided)
+    shared  = loading != None
+    loading = loading if shared else Loading (self.config.solver, self.mcs [0] .workers ())
+
     # load all levels
     for level in self.config.levels:
 
@@ -700,9 +724,15 @@ class MLMC (object):
 
         mc = self.mcs [ self.config.pick [level] [type] ]
         pending = mc.pending ()
-        loaded  [type] = mc.load ()
+        if lazy and self.params.incremental:
+          mc.recall (self.indicators.qois)
+        loaded  [type] = mc.load (self.indicators.qois if self.config.projection else None, lazy, loading)
         invalid [type] = mc.invalid ()
 
+        # update the persistent cache of loaded results (entries of deferred results are kept)
+        if self.params.incremental:
+          mc.store ()
+
         # report
         typestr    = [' FINE ', 'COARSE'] [mc.config.type]
         samplesstr = intf(len(mc.config.samples), table=1)
@@ -751,9 +781,16 @@ class MLMC (object):
       self.config.samples.indices.invalid [level] = list ( set (invalid [self.config.FINE]) | set (invalid [self.config.COARSE]) )
       self.config.samples.counts.invalid  [level] = len (self.config.samples.indices.invalid [level])
 
+    # all results are loaded (a provided pool is closed by the caller)
+    if not shared:
+      loading.close ()
+
     # save progress to a file
     f.write (header + buffer)
 
+    # keep MC simulations with loaded results
+    self.loaded = self.mcs
+
     # report how many pairs of fine and course samples were loaded
     header = '\n :: LOADED VALID PAIRS (FINE & COARSE):'
     header += '\n' + '  :  LEVEL  |  SAMPLES  |  INCLUDED  |  EXCLUDED  |'
@@ -807,6 +844,29 @@ class MLMC (object):
     for mc in self.mcs:
       mc.progress ()
 
+  # make sure that the specified qois (None for all qois) are loaded
+  def require (self, qois=None):
+
+    # pool of loading workers shared by all levels and types
+    loading = Loading (self.config.solver, self.mcs [0] .workers ())
+
+    invalid = [ mc.require (qois, loading=loading) for mc in self.mcs ]
+
+    loading.close ()
+
+    # samples with invalid results (in the additionally loaded qois) are excluded from the levels using them
+    for level in self.config.levels:
+      for type in self.config.types (level):
+        indices = invalid [ self.config.pick [level] [type] ]
+        if indices == []:
+          continue
+        self.config.samples.indices.loaded  [level] = list ( set (self.config.samples.indices.loaded [level]) - set (indices) )
+        self.config.samples.indices.invalid [level] = list ( set (self.config.samples.indices.invalid [level]) | set (indices) )
+        self.config.samples.counts.loaded   [level] = len (self.config.samples.indices.loaded  [level])
+        self.config.samples.counts.invalid  [level] = len (self.config.samples.indices.invalid [level])
+        self.config.samples.counts.failed   [level] = self.config.samples.counts.combined [level] - self.config.samples.counts.loaded [level]
+        helpers.warning ( 'Invalid results of %d samples at level %d (type %d) are excluded' % (len (indices), level, type) )
+
   # assemble MC and MLMC estimates
   def assemble (self, stats, qois=None, clip=True):
 
@@ -825,11 +885,15 @@ class MLMC (object):
       for qoi in qois.keys():
         print qoi,
       print
+
+    # make sure that the qois to be assembled are loaded
+    self.require (qois.keys () if qois != None else None)
     
     # assemble MC estimates on all levels and types for each statistic
     print '  : MC estimates...'
 
-    for mc in self.mcs:
+    tasks = []
+    for position, mc in enumerate (self.mcs):
 
       # bugfix when self.L0 != 0
       if mc.config.level == self.L0 and mc.config.type == self.config.COARSE:
@@ -837,12 +901,27 @@ class MLMC (object):
       else:
         indices = self.config.samples.indices.loaded [mc.config.level]
       
-      # assemble MC estimate
-      mc.assemble (stats, indices, qois)
+      tasks.append ( (position, indices) )
+
+    # number of worker processes
+    workers = min ( self.mcs [0] .workers (), len (tasks) )
+
+    # assemble MC estimates concurrently
+    if workers > 1:
+      assemble_parallel (self.mcs, stats, qois, tasks, workers)
+
+    # assemble MC estimates sequentially
+    else:
+      for position, indices in tasks:
+        self.mcs [position] .assemble (stats, indices, qois)
     
+    # align MC estimates of all levels and types for each statistic (e.g. common bins of adaptive histograms)
+    for index, stat in enumerate (stats):
+      stat.align ( [ mc.stats [index] for mc in self.mcs if mc.stats [index] .available ] )
+
     # assemble differences of MC estimates between type = 0 and type = 1 on all levels for each statistic
     print '  : Differences of MC estimates...'
-    self.diffs = [ copy.deepcopy (stats) for level in self.config.levels ]
+    self.diffs = [ [ stat.clone () for stat in stats ] for level in self.config.levels ]
     
     # coarsest level difference is just a plain MC estimate (for all statistics)
     # TODO: what if this estimate is missing?
@@ -874,7 +953,7 @@ class MLMC (object):
         
     # assemble MLMC estimates (sum of differences for each statistic)
     print '  : MLMC estimates...'
-    self.stats = copy.deepcopy (stats)
+    self.stats = [ stat.clone () for stat in stats ]
 
     # check if all stats are available for the coarsest level
     available = [ stat for stat in self.diffs [self.L0] if not stat.available ] == []
@@ -887,7 +966,7 @@ class MLMC (object):
     
     # copy coarsest difference for each statistic
     for index, stat in enumerate (self.stats):
-      stat.estimate  = copy.deepcopy (self.diffs [self.L0] [index] .estimate)
+      stat.estimate  = self.diffs [self.L0] [index] .estimate.duplicate ()
       stat.available = self.diffs [self.L0] [index] .available
     
     # add remaining differences
@@ -905,6 +984,17 @@ class MLMC (object):
       for index, stat in enumerate (self.stats):
         stat.estimate += self.diffs [level] [index] .estimate
 
+    # finalize MLMC estimates (e.g. reduce bootstrap replicates to confidence intervals)
+    for stat in self.stats:
+      stat.conclude ()
+
+    # MC estimates of transient statistics (e.g. bootstrap replicates of all levels) are no longer needed
+    for index, stat in enumerate (self.stats):
+      if stat.transient:
+        for estimates in [ mc.stats for mc in self.mcs ] + self.diffs:
+          estimates [index] .estimate  = None
+          estimates [index] .available = 0
+
     print '  : DONE'
 
     # clip MLMC estimates, if specified
@@ -612,6 +612,17 @@ class Solver (object):
     # check if the status file exists
     return os.path.exists ( os.path.join (directory, self.statusfile) )
 
+  # return the modification time of the status file of a finished job (None if the job is not finished)
+  def stamp (self, level, type, sample):
+
+    # get status file
+    statusfile = os.path.join ( self.directory ( level, type, sample ), self.statusfile )
+
+    try:
+      return os.path.getmtime (statusfile)
+    except OSError:
+      return None
+
   # read 'timerfile' from 'directory' and return runtime
   def runtime (self, directory, timerfile):
 
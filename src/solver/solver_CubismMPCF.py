@@ -89,6 +89,31 @@ class CubismMPCF (Solver):
         #self.distance = lambda f, c : numpy.mean ( numpy.abs ( numpy.array ( [ entry for entry in (f [self.qoi] - c [self.qoi]) if not numpy.isnan (entry) ] ) ) ) if c != None else self.indicator (f)
         self.distance = lambda f, c : numpy.mean ( numpy.abs ( (f - c) [self.qoi] ) ) if c != None else self.indicator (f)
 
+    # set vectorized indicator and distance for the stacked data (samples x elements) of a whole level,
+    # consistent with the default indicator and distance above
+    self.stacked_indicator = None
+    self.stacked_distance  = None
+    if not indicator and not distance:
+
+      # maximum-norm based indicator and distance
+      if self.norm == 'max':
+        self.stacked_indicator = lambda stack : numpy.max ( numpy.abs (stack) .reshape ( len (stack), -1 ), axis=1 )
+        self.stacked_distance  = lambda f, c : self.stacked_indicator (f) - self.stacked_indicator (c) if c is not None else self.stacked_indicator (f)
+
+      # 1-norm based indicator and distance
+      if self.norm == 1:
+        self.stacked_indicator = lambda stack : numpy.mean ( numpy.abs (stack) .reshape ( len (stack), -1 ), axis=1 )
+        self.stacked_distance  = lambda f, c : self.stacked_indicator (f - c) if c is not None else self.stacked_indicator (f)
+
+    # set rescaling of the distances from the (unscaled) indicator values, if the default distance is homogeneous:
+    # rescale (a, f, b, c) = distance (a * F, b * C) for results F and C with indicator values f and c (C = None if c is None)
+    self.rescale = None
+    if not indicator and not distance:
+
+      # the maximum-norm indicator is positively homogeneous and the distance is the difference of the indicators
+      if self.norm == 'max':
+        self.rescale = lambda a, f, b, c : abs (a) * f - abs (b) * c if c is not None else abs (a) * f
+
   # return string representing the resolution of a given discretization 'd'
   def resolution_string (self, d):
     from helpers import intf
@@ -181,10 +206,10 @@ class CubismMPCF (Solver):
     time = numpy.max ( [ time for step, time in enumerate (results.meta ['t']) if not numpy.isnan (results.data [self.qoi] [step]) ] )
     return float (time) / self.tend
 
-  def load (self, level=0, type=0, sample=0):
+  def load (self, level=0, type=0, sample=0, qois=None):
     
-    # load results from the specified directory
-    return self.dataclass.load ( self.directory (level, type, sample), self.params.verbose )
+    # load results (only the specified qois, if any) from the specified directory
+    return self.dataclass.load ( self.directory (level, type, sample), self.params.verbose, qois )
 
     # TODO: remove legacy code below
     '''
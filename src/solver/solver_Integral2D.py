@@ -95,8 +95,8 @@ class Integral2D (Solver):
     # execute/submit job (self.cmd % args)
     self.launch (args, parallelization, level, type, sample)
   
-  # open output file and read results
-  def load (self, level, type, sample):
+  # open output file and read results (all qois are always loaded)
+  def load (self, level, type, sample, qois=None):
     
     outputfile = open ( os.path.join (self.directory (level, type, sample), self.outputfile), 'r' )
     lines = outputfile .readlines ()
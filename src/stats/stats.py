@@ -26,43 +26,128 @@ class Stat (object):
   # alpha by default is disabled
   alpha = 0
 
-  # evalaute statistics for all qois
-  def evaluate (self, samples, indices=None, qois=None):
+  # memory limit (in bytes) for stacked ensembles of non-online statistics
+  memory = 2 ** 28
+
+  # whether estimates from disjoint subsets of samples can be merged (requires 'state', 'restore' and 'combine')
+  mergeable = 0
+
+  # states (sufficient statistics) of online estimates for each qoi
+  states = {}
+
+  # whether samples can be removed from mergeable estimates (requires 'separate')
+  removable = 0
+
+  # level of the MC estimate being assembled (None for MLMC estimates)
+  mclevel = None
+
+  # whether the MC estimates are only needed to combine the MLMC estimate (released once it is concluded)
+  transient = 0
+
+  # identity of the statistic (class and scalar configuration parameters), used to match persistent states
+  def identity (self):
+
+    params = [ (key, value) for key, value in sorted ( vars (self) .items () ) if isinstance ( value, (int, long, float, str, type (None)) ) ]
+    return repr ( (self.__class__.__name__, params) )
+
+  # merge an estimate of the same statistic computed from a disjoint subset of samples
+  def merge (self, other):
+
+    if not self.mergeable:
+      helpers.warning ('Statistic \'%s\' can not be merged' % self.name)
+      return
+
+    if not other.available:
+      return
+
+    if not self.available:
+      self.estimate  = other.estimate.duplicate ()
+      self.states    = copy.deepcopy (other.states)
+      self.available = 1
+      return
+
+    for qoi, state in other.states.iteritems ():
+      if qoi in self.states:
+        self.restore (self.states [qoi])
+        self.combine (state)
+        self.states   [qoi] = self.state ()
+        self.estimate [qoi] = self.result ()
+
+  # compute statistic for all elements of the stacked ensemble (samples x elements) along the first axis
+  # the generic version computes the statistic separately for each element
+  def reduce (self, stack, extent):
+
+    return numpy.array ( [ self.compute (stack [:, element], extent) for element in xrange (stack.shape [1]) ] )
+
+  # check availability of samples and setup the estimate (returns whether the statistic is available)
+  def setup (self, samples, indices):
 
     # statistic is initially not available
     self.available = 0
-    
-    # compute indices, if not explicitely specified
-    if indices == None:
-      indices = [ index for index, sample in enumerate (samples) if sample != None ]
+    self.states    = {}
 
     # check if at least one sample is available
     if len (indices) == 0:
       print '       %-30s[%s]' % (self.name, 'unavailable')
-      return
+      return 0
     
     # check if sufficiently many samples are available
     if len (indices) < self.limit:
       print '       %-30s[%s]' % (self.name, 'insufficient')
-      return
+      return 0
     
     # statistic will be available
     self.available = 1
 
-    # copy data class from the first valid sample
-    self.estimate = copy.deepcopy ( samples [ indices [0] ] )
+    # allocate estimate (of the data class of the first valid sample) according to statistics size
+    self.estimate = samples [ indices [0] ] .like (self.size)
+
+    return 1
+
+  # align the MC estimates (of this statistic) of all levels and types, such that they can be combined (nothing to do by default)
+  def align (self, stats):
+
+    pass
+
+  # finalize the MLMC estimate, after the MC estimates of all levels are combined (nothing to do by default)
+  def conclude (self):
+
+    pass
+
+  # check if removing the sufficient statistics of a subset of the samples from the current estimate (see 'separate')
+  # yields the same estimate as an assembly of the remaining samples (always, by default)
+  def separable (self, state):
+
+    return 1
+
+  # independent copy of the statistic (without estimates)
+  def clone (self):
+
+    estimate, states = self.estimate, self.states
+    self.estimate, self.states = None, {}
+    clone = copy.deepcopy (self)
+    self.estimate, self.states = estimate, states
+
+    return clone
+
+  # independent copy of the statistic (without estimates) for online estimation
+  def accumulator (self):
 
-    # resize estimate according to statistics size
-    if not self.online:
-      self.estimate.resize (self.size)
+    return self.clone ()
+
+  # evalaute statistics for all qois
+  def evaluate (self, samples, indices=None, qois=None):
+    
+    # compute indices, if not explicitely specified
+    if indices == None:
+      indices = [ index for index, sample in enumerate (samples) if sample != None ]
+
+    # check availability and setup the estimate
+    if not self.setup (samples, indices):
+      return
     
     # quantities of interest to be assembled
-    if qois == None:
-      names   = self.estimate.qois
-      extents = [ None for name in names ]
-    else:
-      names   = qois.keys()
-      extents = qois.values()
+    names, extents = select (self.estimate, qois)
 
     # use progress indicator, report current statistic each time
     prefix = '       %-30s' % self.name
@@ -98,20 +183,21 @@ class Stat (object):
         # store estimated statistic
         self.estimate [qoi] = self.result ()
 
+        # store sufficient statistics for merging
+        if self.mergeable:
+          self.states [qoi] = self.state ()
+
       # templated online estimation is NOT supported by statistic
       else:
 
-        # compute sample statistics for each element in a flattened array
-        for element in xrange ( len ( self.estimate.serialize (qoi) ) ):
+        target = self.estimate.serialize (qoi)
+        for begin, end, stack in blocks (samples, indices, qoi, self.memory):
 
-          # create an ensemble of sample values
-          ensemble = [ sample.serialize (qoi) [element] for index, sample in enumerate (samples) if index in indices ]
+          # compute statistic for all elements in the block
+          target [begin:end] = numpy.reshape ( self.reduce (stack, extent), target [begin:end] .shape )
 
-          # compute statistic
-          self.estimate.serialize (qoi) [element] = self.compute (ensemble, extent)
-
-        # update progress
-        progress.update ( (i + 1) * len (indices) )
+          # update progress
+          progress.update ( i * len (indices) + (len (indices) * end) / len (target) )
       
     # finalize progress indicator
     progress.finalize()
@@ -119,3 +205,124 @@ class Stat (object):
     # report missing qois
     if failed != []:
       helpers.warning ('Missing QoIs: %s' % ' '.join (failed) )
+
+# names and extents of quantities of interest to be assembled
+def select (estimate, qois):
+
+  if qois == None:
+    names   = estimate.qois
+    extents = [ None for name in names ]
+  else:
+    names   = qois.keys()
+    extents = qois.values()
+
+  return names, extents
+
+# stacked ensembles (samples x elements) of the serialized data of a qoi for consecutive blocks of elements,
+# such that each stacked ensemble fits into the memory limit (in bytes)
+# if the data of all samples is already stacked (e.g. in a memory-mapped store), blocks are (zero-copy) views of it
+def blocks (samples, indices, qoi, memory, stacked=None):
+
+  # serialized data of all samples, with an additional axis for the values within each element
+  serialized = [ samples [index] .serialize (qoi) for index in indices ]
+  elements   = len (serialized [0])
+  serialized = [ numpy.reshape (values, (elements, -1)) for values in serialized ]
+  width      = serialized [0] .shape [1]
+  itemsize   = serialized [0] .dtype.itemsize
+
+  block = max ( 1, int ( memory / ( itemsize * len (indices) * width ) ) )
+
+  # views of the stacked data (a single value within each element)
+  if stacked is not None and width == 1 and stacked.size == len (indices) * elements:
+    stacked = stacked.reshape ( (len (indices), elements) )
+    for begin in xrange (0, elements, block):
+      end = min (begin + block, elements)
+      yield begin, end, stacked [ :, begin:end ]
+    return
+
+  for begin in xrange (0, elements, block):
+    end = min (begin + block, elements)
+
+    # stack the ensembles of sample values for all elements in the block
+    stack = numpy.array ( [ values [begin:end] for values in serialized ] )
+    stack = stack.transpose (0, 2, 1) .reshape ( (-1, end - begin) )
+
+    yield begin, end, stack
+
+# evaluate several statistics for all qois in a single pass over the samples:
+# each sample updates all online statistics for all qois at once,
+# and non-online statistics share the stacked ensembles of each qoi
+# stacked data of all samples for a qoi (or None) can be provided by 'stacks', e.g. by a memory-mapped store
+def evaluate (stats, samples, indices=None, qois=None, stacks=None):
+
+  # compute indices, if not explicitely specified
+  if indices == None:
+    indices = [ index for index, sample in enumerate (samples) if sample != None ]
+
+  # statistics with a specialized evaluation are evaluated separately
+  for stat in stats:
+    if type (stat) .evaluate.im_func is not Stat.evaluate.im_func:
+      stat.evaluate (samples, indices, qois)
+  stats = [ stat for stat in stats if type (stat) .evaluate.im_func is Stat.evaluate.im_func ]
+
+  # check availability and setup the estimates
+  available = [ stat for stat in stats if stat.setup (samples, indices) ]
+  if available == []:
+    return
+
+  # quantities of interest to be assembled
+  names, extents = select (available [0] .estimate, qois)
+
+  # check if qois are available
+  failed = [ qoi for qoi in names if qoi not in available [0] .estimate.data ]
+  qois   = [ (qoi, extent) for qoi, extent in zip (names, extents) if qoi not in failed ]
+
+  online  = [ stat for stat in available if stat.online ]
+  offline = [ stat for stat in available if not stat.online ]
+
+  # use progress indicator for all statistics
+  prefix = '       %-30s' % ( ', '.join ( [ stat.name for stat in available ] ) [:30] )
+  steps = ( len (indices) if online else 0 ) + len (qois) * len (offline)
+  progress = helpers.Progress (prefix=prefix, steps=steps, length=20)
+  progress.init ()
+
+  # independent online estimates for each statistic and each qoi
+  accumulators = [ [ stat.accumulator () for qoi in qois ] for stat in online ]
+  for row in accumulators:
+    for accumulator in row:
+      accumulator.init ()
+
+  # single pass over all samples, updating all online statistics for all qois
+  for step, index in enumerate (indices):
+    sample = samples [index]
+    for i, (qoi, extent) in enumerate (qois):
+      values = sample [qoi]
+      for row in accumulators:
+        row [i] .update (values, extent)
+    if online:
+      progress.update (step + 1)
+
+  # store estimated online statistics
+  for stat, row in zip (online, accumulators):
+    for (qoi, extent), accumulator in zip (qois, row):
+      stat.estimate [qoi] = accumulator.result ()
+      if stat.mergeable:
+        stat.states [qoi] = accumulator.state ()
+
+  # non-online statistics of each qoi share the same stacked ensembles
+  offset = len (indices) if online else 0
+  for i, (qoi, extent) in enumerate (qois):
+    targets = [ stat.estimate.serialize (qoi) for stat in offline ]
+    if offline != []:
+      stacked = stacks (qoi) if stacks != None else None
+      for begin, end, stack in blocks (samples, indices, qoi, min ( [ stat.memory for stat in offline ] ), stacked):
+        for stat, target in zip (offline, targets):
+          target [begin:end] = numpy.reshape ( stat.reduce (stack, extent), target [begin:end] .shape )
+      progress.update ( offset + (i + 1) * len (offline) )
+
+  # finalize progress indicator
+  progress.finalize()
+
+  # report missing qois
+  if failed != []:
+    helpers.warning ('Missing QoIs: %s' % ' '.join (failed) )
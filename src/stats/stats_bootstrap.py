@@ -0,0 +1,147 @@
+
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+# Statistics class for bootstrap confidence intervals
+# TODO: add paper, description and link           #
+#                                                 #
+# Jonas Sukys                                     #
+# CSE Lab, ETH Zurich, Switzerland                #
+# sukys.jonas@gmail.com                           #
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+
+from stats import Stat
+import numpy
+import warnings
+import atexit
+import multiprocessing
+
+# pool of resampling workers, shared by all blocks, qois and levels of an assembly
+# (closed when the MLMC estimates are concluded, or at exit)
+pool = None
+
+# evaluate the statistic for a chunk of bootstrap replicates of the stacked ensemble (executed by the resampling workers)
+def resample (task):
+
+  statistic, percentile, stack, rows = task
+  return replicate (statistic, percentile, stack, rows)
+
+# evaluate the statistic of the stacked ensemble (samples x elements) for the specified resampled indices
+def replicate (statistic, percentile, stack, rows):
+
+  count = stack.shape [0]
+
+  # mean of the resampled ensembles as a matrix product with the counts of each sample in each replicate
+  if statistic == 'mean':
+    offsets = rows + count * numpy.arange (len (rows)) [:, numpy.newaxis]
+    counts  = numpy.bincount ( offsets.ravel (), minlength = len (rows) * count ) .reshape ( (len (rows), count) )
+    return numpy.dot (counts, stack) / float (count)
+
+  # percentile of the resampled ensembles (replicates x samples x elements)
+  return numpy.percentile (stack [rows], percentile, axis=1)
+
+# close the pool of resampling workers
+def close ():
+
+  global pool
+  if pool != None:
+    pool.close ()
+    pool.join ()
+    pool = None
+
+atexit.register (close)
+
+# bootstrap confidence intervals of the sampling error of the mean (or of a percentile):
+# MC estimates consist of all bootstrap replicates (last axis), which are combined into MLMC replicates
+# using the same coefficients as all other statistics, and only then reduced to confidence intervals
+# (the replicates of the MC estimates are released afterwards)
+class Bootstrap (Stat):
+
+  def __init__ (self, statistic='mean', percentile=50, replicates=200, lower=0.05, upper=0.95, seed=0, workers=1, name=None):
+
+    self.size      = replicates
+    self.limit     = 2
+    self.online    = 0
+    self.transient = 1
+
+    self.statistic  = statistic
+    self.percentile = percentile
+    self.replicates = replicates
+    self.lower      = lower
+    self.upper      = upper
+    self.seed       = seed
+    self.workers    = workers
+
+    # confidence level of the intervals
+    self.level = upper - lower
+    self.alpha = 1.0 - self.level
+
+    if name == None:
+      label = 'mean' if statistic == 'mean' else 'percentile %g' % percentile
+      self.name = 'bootstrap %s %.2f - %.2f' % (label, lower, upper)
+    else:
+      self.name = name
+
+  # resampled sample indices (replicates x samples) for the specified number of samples:
+  # the same indices are used for all qois and elements, and for both types of each level (coupled samples),
+  # whereas different levels are resampled independently
+  def indices (self, count):
+
+    level = self.mclevel if self.mclevel != None else -1
+    generator = numpy.random.RandomState ( [ self.seed, level + 1 ] )
+
+    return generator.randint (0, count, size=(self.replicates, count))
+
+  # evaluate the statistic of the stacked ensemble (samples x elements) for the specified resampled indices
+  def resampled (self, stack, rows):
+
+    return replicate (self.statistic, self.percentile, stack, rows)
+
+  # compute bootstrap replicates for all elements at once, in chunks of replicates fitting into the memory limit
+  def reduce (self, stack, extent):
+
+    warnings.simplefilter ('ignore')
+
+    rows = self.indices (stack.shape [0])
+
+    # resampled ensembles of the percentile are stacked in memory
+    if self.statistic == 'mean':
+      chunk = self.replicates
+    else:
+      chunk = max ( 1, int ( self.memory / (8 * stack.size) ) )
+    chunk  = min ( chunk, int ( numpy.ceil ( self.replicates / float (self.workers) ) ) )
+    chunks = [ rows [begin : begin + chunk] for begin in xrange (0, self.replicates, chunk) ]
+
+    # worker processes of a parallel assembly pool are not allowed to fork
+    if self.workers > 1 and len (chunks) > 1 and not multiprocessing.current_process () .daemon:
+
+      # the pool is created once and reused for all subsequent blocks
+      global pool
+      if pool == None:
+        pool = multiprocessing.Pool (self.workers)
+
+      tasks = [ (self.statistic, self.percentile, stack, rows) for rows in chunks ]
+      try:
+        replicates = pool.map (resample, tasks)
+      except:
+        pool.terminate ()
+        pool.join ()
+        pool = None
+        raise
+
+    else:
+      replicates = [ self.resampled (stack, rows) for rows in chunks ]
+
+    return numpy.vstack (replicates) .T
+
+  # reduce the (MLMC) bootstrap replicates to confidence intervals
+  def conclude (self):
+
+    # all replicates are computed
+    close ()
+
+    warnings.simplefilter ('ignore')
+
+    for qoi, replicates in self.estimate.data.items ():
+      interval = numpy.percentile (replicates, [ 100 * self.lower, 100 * self.upper ], axis=-1)
+      self.estimate.data [qoi] = numpy.rollaxis (interval, 0, interval.ndim)
+
+    self.size = 2
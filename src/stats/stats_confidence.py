@@ -14,11 +14,11 @@ import warnings
 
 class Confidence (Stat):
   
-  def __init__ (self, name=None, level=5, lower=None, upper=None):
+  def __init__ (self, name=None, level=5, lower=None, upper=None, online=0):
     
     self.size   = 2
     self.limit  = 2
-    self.online = 0
+    self.online = online
 
     self.level = level
     self.lower = lower
@@ -32,7 +32,29 @@ class Confidence (Stat):
 
     if name == None:
       self.name = 'confidence %.2f - %.2f' % (self.lower, self.upper)
+    else:
+      self.name = name
+
+    # online estimation of percentiles
+    if self.online:
+      from stats_percentile import Percentile
+      self.percentiles = Percentile ( [ 100 * self.lower, 100 * self.upper ] )
     
+  # initialize online estimation
+  def init (self):
+
+    self.percentiles.init ()
+
+  # update online estimate with a sample
+  def update (self, sample, extent):
+
+    self.percentiles.update (sample, extent)
+
+  # return the current online estimate
+  def result (self):
+
+    return self.percentiles.result ()
+
   # compute percentiles to form a confidence interval
   def compute (self, samples, extent):
 
@@ -43,4 +65,11 @@ class Confidence (Stat):
     interval [0] = numpy.percentile (samples, 100 * self.lower)
     interval [1] = numpy.percentile (samples, 100 * self.upper)
     
-    return interval
\ No newline at end of file
+    return interval
+
+  # compute percentiles for all elements at once
+  def reduce (self, stack, extent):
+
+    warnings.simplefilter ('ignore')
+
+    return numpy.percentile (stack, [ 100 * self.lower, 100 * self.upper ], axis=0) .T
@@ -1,6 +1,6 @@
 
 # # # # # # # # # # # # # # # # # # # # # # # # # #
-# General balancer classes                        #
+# Statistics class for covariances between qois
 # TODO: add paper, description and link           #
 #                                                 #
 # Jonas Sukys                                     #
@@ -8,4 +8,160 @@
 # sukys.jonas@gmail.com                           #
 # # # # # # # # # # # # # # # # # # # # # # # # # #
 
+from stats import Stat
+import numpy
+import helpers
 
+# online (mergeable) covariances between the specified qois, for each element (e.g. each time point):
+# the estimate of each qoi consists of its covariances with all specified qois (last axis),
+# MLMC estimates are combined from the covariances of all levels and types, and optionally normalized to correlations
+class Covariance (Stat):
+
+  def __init__ (self, qois, name=None, correlation=0):
+
+    self.size      = len (qois)
+    self.limit     = 2
+    self.online    = 1
+    self.mergeable = 1
+
+    self.qois        = qois
+    self.correlation = correlation
+
+    if name == None:
+      self.name = 'correlation' if correlation else 'covariance'
+    else:
+      self.name = name
+
+    # covariances are not clipped to the ranges of the qois
+    self.clip  = [None, None]
+    self.alpha = 0
+
+  # initialize
+  def init (self):
+
+    self.count    = 0
+    self.mean     = None
+    self.comoment = None
+
+  # update estimate with a sample, given as values of all elements (rows) for all qois (columns)
+  def update (self, values, extent=None):
+
+    self.count += 1
+
+    if self.count == 1:
+      self.mean     = numpy.array (values, dtype=float)
+      self.comoment = numpy.zeros ( values.shape + values.shape [-1:] )
+      return
+
+    # co-moments are updated in a numerically stable way (Welford)
+    delta          = values - self.mean
+    self.mean     += delta / float (self.count)
+    self.comoment += delta [:, :, numpy.newaxis] * (values - self.mean) [:, numpy.newaxis, :]
+
+  # return the current estimate (elements x qois x qois)
+  def result (self):
+
+    return self.comoment / float (self.count - 1)
+
+  # sufficient statistics of the current estimate
+  def state (self):
+
+    return { 'count' : self.count, 'mean' : numpy.copy (self.mean), 'comoment' : numpy.copy (self.comoment) }
+
+  # restore the estimate from its sufficient statistics
+  def restore (self, state):
+
+    self.count    = state ['count']
+    self.mean     = numpy.copy (state ['mean'])
+    self.comoment = numpy.copy (state ['comoment'])
+
+  # combine the current estimate with sufficient statistics of a disjoint subset of samples (Chan et al.)
+  def combine (self, state):
+
+    if state ['count'] == 0:
+      return
+
+    if self.count == 0:
+      self.restore (state)
+      return
+
+    na    = float (self.count)
+    nb    = float (state ['count'])
+    count = na + nb
+    delta = state ['mean'] - self.mean
+
+    self.comoment = self.comoment + state ['comoment'] + delta [:, :, numpy.newaxis] * delta [:, numpy.newaxis, :] * (na * nb / count)
+    self.mean     = self.mean + delta * (nb / count)
+    self.count    = self.count + state ['count']
+
+  # store the current estimate for all qois
+  def publish (self, names):
+
+    covariance = self.result ()
+
+    for i, qoi in enumerate (names):
+      self.estimate [qoi] = covariance [:, i, :] .reshape ( numpy.shape (self.estimate [qoi]) )
+
+    self.states = { 'comoments' : self.state () }
+
+  # evaluate covariances between all qois in a single pass over the samples
+  def evaluate (self, samples, indices=None, qois=None):
+
+    # compute indices, if not explicitely specified
+    if indices == None:
+      indices = [ index for index, sample in enumerate (samples) if sample != None ]
+
+    # check availability and setup the estimate
+    if not self.setup (samples, indices):
+      return
+
+    # all specified qois are required
+    failed = [ qoi for qoi in self.qois if qoi not in self.estimate.data ]
+    if failed != []:
+      helpers.warning ('Missing QoIs: %s' % ' '.join (failed) )
+      self.available = 0
+      return
+
+    # use progress indicator
+    prefix = '       %-30s' % self.name
+    progress = helpers.Progress (prefix=prefix, steps=len (indices), length=20)
+    progress.init ()
+
+    self.init ()
+    for step, index in enumerate (indices):
+      values = numpy.array ( [ numpy.ravel (samples [index] [qoi]) for qoi in self.qois ] ) .T
+      self.update (values)
+      progress.update (step + 1)
+
+    self.publish (self.qois)
+
+    progress.finalize ()
+
+  # merge an estimate of the same statistic computed from a disjoint subset of samples
+  def merge (self, other):
+
+    if not self.available or not other.available:
+      Stat.merge (self, other)
+      return
+
+    self.restore (self.states ['comoments'])
+    self.combine (other.states ['comoments'])
+    self.publish (self.qois)
+
+  # normalize MLMC covariances to correlations, if requested
+  def conclude (self):
+
+    if not self.correlation:
+      return
+
+    deviations = [ numpy.sqrt ( numpy.abs ( self.estimate [qoi] [..., i] ) ) for i, qoi in enumerate (self.qois) ]
+
+    with numpy.errstate (invalid='ignore', divide='ignore'):
+      for i, qoi in enumerate (self.qois):
+        for j in range (len (self.qois)):
+          self.estimate [qoi] [..., j] /= deviations [i] * deviations [j]
+
+  # covariance (or correlation) matrix between all qois for the specified element (e.g. time point)
+  def matrix (self, element=-1):
+
+    return numpy.array ( [ numpy.reshape (self.estimate [qoi], (-1, len (self.qois))) [element] for qoi in self.qois ] )
@@ -10,35 +10,49 @@
 
 from stats import Stat
 import copy
+import numpy
 
 class Deviation (Stat):
   
-  def __init__ (self, name='std. dev.', factor=1):
+  def __init__ (self, name='std. dev.', factor=1, moments=2):
 
-    self.size   = 1
-    self.limit  = 2
-    self.online = 1
-    self.alpha  = min (1.0, 0.2 + 0.3 * factor)
-    self.clip   = [0, None]
+    self.size      = 1
+    self.limit     = 2
+    self.online    = 1
+    self.alpha     = min (1.0, 0.2 + 0.3 * factor)
+    self.clip      = [0, None]
+    self.mergeable = 1
 
-    self.name   = name
-    self.factor = factor
+    self.name    = name
+    self.factor  = factor
+
+    # number of central moments to be tracked (2, 3 or 4) - higher moments are only needed for derived statistics
+    self.moments = moments
+
+    # samples can only be removed if higher moments are not tracked
+    self.removable = (moments == 2)
     
   # initialize
   def init (self):
     
     self.count     = 0
     self.deviation = None
+    self.mean      = None
+    self.M2        = None
+    self.M3        = None
+    self.M4        = None
   
   # update estimate with a sample
   def update (self, sample, extent):
 
-    # first sample is simply copied
+    # first sample is simply copied (and accumulated in float64, independently of the precision of the samples)
     if self.count == 0:
 
-      self.delta     = copy.deepcopy (sample)
+      self.delta     = numpy.array (sample, dtype=float)
       self.mean      = copy.deepcopy (self.delta)
       self.M2        = self.delta * (sample - self.mean)
+      if self.moments >= 3: self.M3 = copy.deepcopy (self.M2)
+      if self.moments >= 4: self.M4 = copy.deepcopy (self.M2)
 
       self.variance  = None
       self.deviation = None
@@ -52,13 +66,92 @@ class Deviation (Stat):
 
       self.delta     = sample - self.mean
       self.mean     += self.delta / float (self.count)
+
+      # higher moments need to be updated before M2
+      if self.moments >= 3:
+        scaled = self.delta / float (self.count)
+        term   = self.delta * scaled * (self.count - 1)
+        if self.moments >= 4:
+          self.M4 += term * scaled ** 2 * (self.count ** 2 - 3 * self.count + 3) + 6 * scaled ** 2 * self.M2 - 4 * scaled * self.M3
+        self.M3 += term * scaled * (self.count - 2) - 3 * scaled * self.M2
+
       self.M2       += self.delta * (sample - self.mean)
 
+      self.finalize ()
+  
+  # compute variance and deviation from the sufficient statistics
+  def finalize (self):
+
+    if self.count > 1:
       self.variance  = self.M2 / float (self.count - 1)
       self.deviation = self.variance ** 0.5
-  
+    else:
+      self.variance  = None
+      self.deviation = None
+
   # return the current estimate
   def result (self):
 
     return self.deviation
-    
+
+  # sufficient statistics of the current estimate
+  def state (self):
+
+    return { 'count' : self.count, 'mean' : copy.deepcopy (self.mean), 'M2' : copy.deepcopy (self.M2), 'M3' : copy.deepcopy (self.M3), 'M4' : copy.deepcopy (self.M4) }
+
+  # restore the estimate from its sufficient statistics
+  def restore (self, state):
+
+    self.count = state ['count']
+    self.mean  = copy.deepcopy (state ['mean'])
+    self.M2    = copy.deepcopy (state ['M2'])
+    self.M3    = copy.deepcopy (state ['M3'])
+    self.M4    = copy.deepcopy (state ['M4'])
+
+    self.finalize ()
+
+  # combine the current estimate with sufficient statistics of a disjoint subset of samples (Chan et al.)
+  def combine (self, state):
+
+    if state ['count'] == 0:
+      return
+
+    if self.count == 0:
+      self.restore (state)
+      return
+
+    na    = float (self.count)
+    nb    = float (state ['count'])
+    count = na + nb
+    delta = state ['mean'] - self.mean
+
+    # higher moments need to be combined before M2
+    if self.moments >= 4 and self.M4 is not None and state ['M4'] is not None:
+      self.M4 = self.M4 + state ['M4'] + delta ** 4 * na * nb * (na ** 2 - na * nb + nb ** 2) / count ** 3 \
+              + 6 * delta ** 2 * (na ** 2 * state ['M2'] + nb ** 2 * self.M2) / count ** 2 + 4 * delta * (na * state ['M3'] - nb * self.M3) / count
+    if self.moments >= 3 and self.M3 is not None and state ['M3'] is not None:
+      self.M3 = self.M3 + state ['M3'] + delta ** 3 * na * nb * (na - nb) / count ** 2 + 3 * delta * (na * state ['M2'] - nb * self.M2) / count
+
+    self.M2    = self.M2 + state ['M2'] + delta ** 2 * na * nb / count
+    self.mean  = self.mean + delta * (nb / count)
+    self.count = self.count + state ['count']
+
+    self.finalize ()
+
+  # remove sufficient statistics of a subset of the samples from the current estimate (only for the first two moments)
+  def separate (self, state):
+
+    count = self.count - state ['count']
+
+    if count == 0:
+      self.init ()
+      return
+
+    mean  = (self.count * self.mean - state ['count'] * state ['mean']) / float (count)
+    delta = state ['mean'] - mean
+
+    self.M2    = self.M2 - state ['M2'] - delta ** 2 * count * state ['count'] / float (self.count)
+    self.mean  = mean
+    self.count = count
+
+    self.finalize ()
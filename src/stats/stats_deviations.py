@@ -41,4 +41,14 @@ class Deviations (Stat):
     result [0] = mean - self.factor * std
     result [1] = mean + self.factor * std
     
-    return result
\ No newline at end of file
+    return result
+
+  # compute mean and standard deviation for all elements at once
+  def reduce (self, stack, extent):
+
+    warnings.simplefilter ('ignore')
+
+    mean = numpy.mean (stack, axis=0)
+    std  = numpy.std  (stack, axis=0, ddof=1)
+
+    return numpy.column_stack ( (mean - self.factor * std, mean + self.factor * std) )
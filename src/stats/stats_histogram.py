@@ -10,6 +10,7 @@
 
 from stats import Stat
 import numpy
+import helpers
 import warnings
 
 class Histogram (Stat):
@@ -32,3 +33,337 @@ class Histogram (Stat):
     histogram, intervals = numpy.histogram (samples, bins=self.size, range=extent)
 
     return histogram / float ( len (samples) )
+
+  # compute histograms for all elements at once (same binning as numpy.histogram)
+  def reduce (self, stack, extent):
+
+    warnings.simplefilter ('ignore')
+
+    count, elements = stack.shape
+
+    # ranges of the bins for each element
+    if extent != None:
+      lower = numpy.full ( elements, extent [0], dtype=float )
+      upper = numpy.full ( elements, extent [1], dtype=float )
+    else:
+      lower = numpy.min (stack, axis=0) .astype (float)
+      upper = numpy.max (stack, axis=0) .astype (float)
+    degenerate = lower == upper
+    lower [degenerate] -= 0.5
+    upper [degenerate] += 0.5
+
+    # bin of each value (values at the upper end belong to the last bin)
+    bins = numpy.floor ( (stack - lower) / (upper - lower) * self.size )
+    bins [ stack == upper ] = self.size - 1
+
+    # values outside of the ranges are discarded
+    inside = (stack >= lower) & (stack <= upper)
+
+    # count values in all bins of all elements at once
+    offsets = numpy.arange (elements) * self.size
+    indices = ( bins + offsets ) [inside] .astype (int)
+    histograms = numpy.bincount ( indices, minlength = elements * self.size ) .reshape ( (elements, self.size) )
+
+    return histograms / float (count)
+
+# adaptive ranges of online histograms are described by grids (scale, origin), where the range is
+# either a dyadic interval [origin * 2^scale, (origin + 1) * 2^scale] or, for origin = None,
+# a symmetric interval [-2^scale, 2^scale] - such ranges are nested, hence histograms can be rebinned exactly
+
+# lower and upper end of the range of a grid
+def bounds (grid):
+
+  scale, origin = grid
+  width = 2.0 ** scale
+
+  if origin == None:
+    return - width, width
+
+  return origin * width, (origin + 1) * width
+
+# grid of the smallest (dyadic or symmetric) range including the specified values
+def fit (lower, upper):
+
+  span  = upper - lower
+  if span <= 0:
+    span = max ( abs (lower), 1.0 ) * 2.0 ** (-20)
+  scale = int ( numpy.ceil ( numpy.log2 (span) ) )
+  grid  = ( scale, int ( numpy.floor ( lower / 2.0 ** scale ) ) )
+
+  # values of both signs require a symmetric range
+  if lower < 0 and upper > 0:
+    return common ( grid, (scale, None) )
+
+  while bounds (grid) [1] < upper:
+    grid = (grid [0] + 1, grid [1] // 2)
+
+  return grid
+
+# grid of the smallest range including the ranges of both specified grids
+def common (a, b):
+
+  # dyadic ranges with the same sign are nested
+  if a [1] != None and b [1] != None and (a [1] >= 0) == (b [1] >= 0):
+    while a != b:
+      if a [0] <= b [0]:
+        a, b = (a [0] + 1, a [1] // 2), b if a [0] < b [0] else (b [0] + 1, b [1] // 2)
+      else:
+        b = (b [0] + 1, b [1] // 2)
+    return a
+
+  # otherwise, a symmetric range is needed
+  extent = max ( [ abs (bound) for bound in bounds (a) + bounds (b) ] )
+  scale  = max ( a [0], b [0], int ( numpy.ceil ( numpy.log2 (extent) ) ) )
+
+  return (scale, None)
+
+# merge pairs of adjacent bins of histograms (of all elements), placing them at the specified offset
+def merge (counts, offset):
+
+  elements, bins = counts.shape
+  merged = counts.reshape ( (elements, bins / 2, 2) ) .sum (axis=2)
+
+  coarse = numpy.zeros_like (counts)
+  coarse [ :, offset : offset + bins / 2 ] = merged
+
+  return coarse
+
+# rebin histograms (of all elements) from the specified grid to the (larger) target grid
+# each step doubles the width of the range, hence pairs of bins are merged into:
+#   - the lower (even origin) or the upper (odd origin) half of the parent dyadic range,
+#   - the upper (origin = 0) or the lower (origin = -1) half of the symmetric range of the same scale,
+#   - the middle half of the parent symmetric range
+def ascend (counts, grid, target):
+
+  scale, origin = grid
+  bins = counts.shape [1] if counts is not None else 4
+
+  while (scale, origin) != target:
+
+    if origin != None and target [1] == None and scale == target [0]:
+      offset = bins / 2 if origin == 0 else 0
+      origin = None
+
+    elif origin != None:
+      offset = 0 if origin % 2 == 0 else bins / 2
+      scale, origin = scale + 1, origin // 2
+
+    else:
+      offset = bins / 4
+      scale += 1
+
+    if counts is not None:
+      counts = merge (counts, offset)
+
+  return counts, (scale, origin)
+
+# online (mergeable) histograms of all elements, with fixed-width bins (or bins of fixed width in log10 space)
+# bins span the range given by 'extent' (of the statistic or of the qoi) or, if no extent is specified,
+# an adaptive range which is doubled (merging pairs of bins) whenever a sample falls outside of it
+class Online_Histogram (Histogram):
+
+  def __init__ (self, name='histogram', bins=100, extent=None, log=0):
+
+    self.name   = name
+    self.size   = bins
+    self.limit  = 1
+    self.online = 1
+
+    self.extent = extent
+    self.log    = log
+
+    self.mergeable = 1
+    self.removable = 1
+
+    # ranges of the histograms for each qoi (set when estimates of all levels and types are aligned)
+    self.ranges = {}
+
+    self.clip  = [0.0, 1.0]
+    self.alpha = 0
+
+    if bins % 4 != 0:
+      helpers.error ('Number of bins of online histograms must be a multiple of 4')
+
+  # initialize
+  def init (self):
+
+    self.count  = 0
+    self.counts = None
+    self.grid   = None
+    self.range  = None
+
+  # lower and upper end of the (fixed or adaptive) range
+  def bounds (self):
+
+    if self.grid != None:
+      return bounds (self.grid)
+
+    return self.range
+
+  # rebin to the specified (larger) adaptive range
+  def extend (self, grid):
+
+    self.counts, self.grid = ascend (self.counts, self.grid, grid)
+
+  # update estimate with a sample
+  def update (self, sample, extent):
+
+    self.shape = numpy.shape (sample)
+    values = numpy.array (sample, dtype=float) .ravel ()
+    elements = len (values)
+
+    # bins in log10 space
+    if self.log:
+      with numpy.errstate (invalid='ignore', divide='ignore'):
+        values = numpy.where ( values > 0, numpy.log10 (values), float ('nan') )
+
+    finite = numpy.isfinite (values)
+
+    if self.counts is None:
+      self.counts = numpy.zeros ( (elements, self.size) )
+    self.count += 1
+
+    # fixed range
+    if self.range == None and self.grid == None:
+      if self.extent != None:
+        extent = self.extent
+      if extent != None:
+        self.range = tuple ( numpy.log10 (extent) ) if self.log else tuple (extent)
+
+    # adaptive range is extended to include all values
+    if self.range == None and finite.any ():
+      grid = fit ( values [finite] .min (), values [finite] .max () )
+      if self.grid == None:
+        self.grid = grid
+      else:
+        self.extend ( common (self.grid, grid) )
+
+    if self.bounds () == None:
+      return
+
+    # bin of each value (values at the upper end belong to the last bin)
+    lower, upper = self.bounds ()
+    with numpy.errstate (invalid='ignore'):
+      bins = numpy.floor ( (values - lower) / (upper - lower) * self.size )
+      bins [ values == upper ] = self.size - 1
+      inside = finite & (bins >= 0) & (bins < self.size)
+
+    # each element contributes to a single bin, hence all flattened indices are distinct
+    indices = ( bins + numpy.arange (elements) * self.size ) [inside] .astype (int)
+    self.counts.ravel () [indices] += 1
+
+  # return the current estimate
+  def result (self):
+
+    histograms = self.counts / float (self.count)
+    return histograms.reshape ( self.shape + (self.size, ) )
+
+  # sufficient statistics of the current estimate
+  def state (self):
+
+    counts = None if self.counts is None else self.counts.copy ()
+    return { 'count' : self.count, 'counts' : counts, 'shape' : getattr (self, 'shape', None), 'grid' : self.grid, 'range' : self.range }
+
+  # restore the estimate from its sufficient statistics
+  def restore (self, state):
+
+    self.count  = state ['count']
+    self.counts = None if state ['counts'] is None else state ['counts'] .copy ()
+    self.shape  = state ['shape']
+    self.grid   = state ['grid']
+    self.range  = state ['range']
+
+  # counts of the specified sufficient statistics, rebinned to the adaptive range of the current estimate
+  def rebin (self, state):
+
+    if self.grid == None or state ['grid'] == None:
+      return state ['counts']
+
+    return ascend (state ['counts'], state ['grid'], self.grid) [0]
+
+  # combine the current estimate with sufficient statistics of a disjoint subset of samples
+  def combine (self, state):
+
+    if state ['count'] == 0:
+      return
+
+    if self.count == 0:
+      self.restore (state)
+      return
+
+    # bins of both adaptive estimates are aligned in their smallest common range
+    if self.grid != None and state ['grid'] != None:
+      self.extend ( common (self.grid, state ['grid']) )
+    elif self.grid == None and self.range == None:
+      self.grid = state ['grid']
+
+    self.counts += self.rebin (state)
+    self.count  += state ['count']
+
+  # remove sufficient statistics of a subset of the samples from the current estimate
+  def separate (self, state):
+
+    count = self.count - state ['count']
+
+    if count == 0:
+      self.init ()
+      return
+
+    # the range of the current estimate includes the range of the subset
+    self.counts -= self.rebin (state)
+    self.count   = count
+
+  # the adaptive range is never shrunk when samples are removed (bins can not be refined),
+  # hence the estimate might differ from an assembly of the remaining samples if their values fit into a smaller range
+  def separable (self, state):
+
+    if self.grid == None or self.count == state ['count']:
+      return 1
+
+    # bins occupied by the remaining samples (for any element)
+    occupied = numpy.flatnonzero ( (self.counts - self.rebin (state)) .sum (axis=0) > 0 )
+    if len (occupied) == 0:
+      return 0
+    first, last = occupied [0], occupied [-1]
+
+    # smaller ranges nested in the current range: both halves, and the middle half of a symmetric range
+    if last < self.size / 2 or first >= self.size / 2:
+      return 0
+    if self.grid [1] == None and first >= self.size / 4 and last < 3 * self.size / 4:
+      return 0
+
+    return 1
+
+  # align bins of the estimates of all levels and types in their smallest common range, such that they can be combined
+  def align (self, stats):
+
+    qois = set ( [ qoi for stat in stats for qoi in stat.states ] )
+
+    for qoi in qois:
+
+      states = [ stat.states [qoi] for stat in stats if qoi in stat.states and stat.states [qoi] ['count'] > 0 ]
+      grids  = [ state ['grid'] for state in states if state ['grid'] != None ]
+      ranges = [ state ['range'] for state in states if state ['range'] != None ]
+
+      # adaptive ranges
+      if grids != []:
+        grid = reduce (common, grids)
+        for stat in stats:
+          if qoi in stat.states and stat.states [qoi] ['grid'] != None:
+            accumulator = stat.accumulator ()
+            accumulator.restore (stat.states [qoi])
+            accumulator.extend (grid)
+            stat.estimate [qoi] = accumulator.result ()
+            stat.states   [qoi] = accumulator.state ()
+        lower, upper = bounds (grid)
+
+      # fixed ranges
+      elif ranges != []:
+        lower, upper = ranges [0]
+
+      else:
+        continue
+
+      self.ranges [qoi] = (10 ** lower, 10 ** upper) if self.log else (lower, upper)
+      for stat in stats:
+        stat.ranges [qoi] = self.ranges [qoi]
@@ -10,6 +10,7 @@
 
 from stats import Stat
 import copy
+import numpy
 
 class Mean (Stat):
   
@@ -17,10 +18,12 @@ class Mean (Stat):
     
     self.name  = name
 
-    self.size   = 1
-    self.limit  = 1
-    self.online = 1
-    self.alpha  = 0
+    self.size      = 1
+    self.limit     = 1
+    self.online    = 1
+    self.alpha     = 0
+    self.mergeable = 1
+    self.removable = 1
   
   # initialize
   def init (self):
@@ -31,10 +34,10 @@ class Mean (Stat):
   # update estimate with a sample
   def update (self, sample, extent):
 
-    # first sample is simply copied
+    # first sample is simply copied (and accumulated in float64, independently of the precision of the samples)
     if self.count == 0:
 
-      self.mean  = copy.deepcopy (sample)
+      self.mean  = numpy.array (sample, dtype=float)
       self.count = 1
     
     # append additional sample in a numerically stable way
@@ -47,4 +50,40 @@ class Mean (Stat):
   def result (self):
 
     return self.mean
-    
+
+  # sufficient statistics of the current estimate
+  def state (self):
+
+    return { 'count' : self.count, 'mean' : copy.deepcopy (self.mean) }
+
+  # restore the estimate from its sufficient statistics
+  def restore (self, state):
+
+    self.count = state ['count']
+    self.mean  = copy.deepcopy (state ['mean'])
+
+  # combine the current estimate with sufficient statistics of a disjoint subset of samples
+  def combine (self, state):
+
+    if state ['count'] == 0:
+      return
+
+    if self.count == 0:
+      self.restore (state)
+      return
+
+    count      = self.count + state ['count']
+    self.mean  = self.mean + (state ['mean'] - self.mean) * ( state ['count'] / float (count) )
+    self.count = count
+
+  # remove sufficient statistics of a subset of the samples from the current estimate
+  def separate (self, state):
+
+    count = self.count - state ['count']
+
+    if count == 0:
+      self.init ()
+      return
+
+    self.mean  = (self.count * self.mean - state ['count'] * state ['mean']) / float (count)
+    self.count = count
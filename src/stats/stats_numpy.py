@@ -40,3 +40,16 @@ class NumPy_Stat (Stat):
       return self.stat (samples, self.params)
     else:
       return self.stat (samples)
+
+  # compute statistic 'self.stat' for all elements at once, if it supports the 'axis' argument
+  def reduce (self, stack, extent):
+
+    warnings.simplefilter ('ignore')
+
+    try:
+      if self.params:
+        return self.stat (stack, self.params, axis=0)
+      else:
+        return self.stat (stack, axis=0)
+    except TypeError:
+      return Stat.reduce (self, stack, extent)
@@ -1,6 +1,6 @@
 
 # # # # # # # # # # # # # # # # # # # # # # # # # #
-# General balancer classes                        #
+# Statistics class for online percentiles
 # TODO: add paper, description and link           #
 #                                                 #
 # Jonas Sukys                                     #
@@ -8,4 +8,130 @@
 # sukys.jonas@gmail.com                           #
 # # # # # # # # # # # # # # # # # # # # # # # # # #
 
+from stats import Stat
+import numpy
 
+# online estimation of percentiles using the P-square algorithm (Jain & Chlamtac, 1985),
+# all elements of the samples and all percentiles are processed at once;
+# percentiles of the first 'exact' samples are exact (these samples are kept, and the markers are computed only afterwards)
+class Percentile (Stat):
+
+  def __init__ (self, percentiles=[50], name=None, clip=None, alpha=0, exact=20):
+
+    self.size   = len (percentiles)
+    self.limit  = 1
+    self.online = 1
+
+    self.percentiles = percentiles
+
+    if name == None:
+      self.name = 'percentile %s (online)' % ', '.join ( [ '%g' % percentile for percentile in percentiles ] )
+    else:
+      self.name = name
+
+    self.clip  = clip
+    self.alpha = alpha
+
+    # at least five samples are needed for the five markers
+    self.exact = max (5, exact)
+
+  # initialize
+  def init (self):
+
+    self.count  = 0
+    self.buffer = []
+
+  # update estimate with a sample
+  def update (self, sample, extent):
+
+    values = numpy.array (sample, dtype=float) .ravel ()
+    self.shape = numpy.shape (sample)
+    self.count += 1
+
+    # the first few samples are kept for exact percentiles
+    if self.count <= self.exact:
+      self.buffer.append (values)
+
+    # adjust the markers (initialized from the kept samples)
+    else:
+      if self.buffer != None:
+        self.start ()
+      with numpy.errstate (invalid='ignore', divide='ignore'):
+        self.step (values)
+
+  # initialize heights and positions of the five markers for each percentile and each element as in Jain & Chlamtac,
+  # i.e. from the first five kept samples (sorted) at the integer positions 0, ..., 4,
+  # and adjust them with the remaining kept samples (such that the markers do not depend on the number of kept samples)
+  def start (self):
+
+    p = numpy.array (self.percentiles, dtype=float) [:, numpy.newaxis] / 100.0
+    elements = len (self.buffer [0])
+
+    self.heights    = numpy.tile ( numpy.sort (numpy.array (self.buffer [:5]), axis=0), (len (self.percentiles), 1, 1) )
+    self.positions  = numpy.tile ( numpy.arange (5, dtype=float) [:, numpy.newaxis], (len (self.percentiles), 1, elements) )
+
+    # desired positions and their increments are the same for all elements
+    self.desired    = numpy.hstack ( [ 0 * p, 2 * p, 4 * p, 2 + 2 * p, 4 + 0 * p ] )
+    self.increments = numpy.hstack ( [ 0 * p, p / 2, p, (1 + p) / 2, 1 + 0 * p ] )
+
+    with numpy.errstate (invalid='ignore', divide='ignore'):
+      for values in self.buffer [5:]:
+        self.step (values)
+
+    self.buffer = None
+
+  # adjust heights and positions of the markers according to a new sample
+  def step (self, values):
+
+    q = self.heights
+    n = self.positions
+
+    # positions of markers above the new value are increased
+    n [:, 1:4] += values < q [:, 1:4]
+    n [:, 4]   += 1
+
+    # extreme markers
+    q [:, 0] = numpy.minimum (q [:, 0], values)
+    q [:, 4] = numpy.maximum (q [:, 4], values)
+
+    self.desired += self.increments
+
+    # adjust heights of the middle markers, if they deviate from their desired positions
+    for i in [1, 2, 3]:
+
+      deviation = self.desired [:, i, numpy.newaxis] - n [:, i]
+      up    = (deviation >=  1) & (n [:, i + 1] - n [:, i] > 1)
+      down  = (deviation <= -1) & (n [:, i - 1] - n [:, i] < -1)
+      move  = up | down
+
+      if not move.any ():
+        continue
+
+      sign = numpy.where (up, 1.0, -1.0)
+
+      # piecewise-parabolic prediction
+      parabolic  = q [:, i] + sign / (n [:, i + 1] - n [:, i - 1]) * ( (n [:, i] - n [:, i - 1] + sign) * (q [:, i + 1] - q [:, i]) / (n [:, i + 1] - n [:, i])
+                                                                     + (n [:, i + 1] - n [:, i] - sign) * (q [:, i] - q [:, i - 1]) / (n [:, i] - n [:, i - 1]) )
+
+      # linear prediction is used if the parabolic prediction is not monotone
+      neighbour  = numpy.where (up, q [:, i + 1], q [:, i - 1])
+      distance   = numpy.where (up, n [:, i + 1], n [:, i - 1]) - n [:, i]
+      linear     = q [:, i] + (neighbour - q [:, i]) / numpy.abs (distance)
+      monotone   = (q [:, i - 1] < parabolic) & (parabolic < q [:, i + 1])
+
+      q [:, i] = numpy.where ( move, numpy.where (monotone, parabolic, linear), q [:, i] )
+      n [:, i] += numpy.where (move, sign, 0)
+
+  # return the current estimate
+  def result (self):
+
+    # exact percentiles for the first few samples
+    if self.buffer != None:
+      estimates = numpy.percentile ( numpy.array (self.buffer), self.percentiles, axis=0 )
+    else:
+      estimates = self.heights [:, 2]
+
+    if self.size > 1:
+      return estimates.T.reshape ( self.shape + (self.size, ) )
+    else:
+      return estimates [0] .reshape (self.shape)
@@ -0,0 +1,74 @@
+
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+# Tests for the memory-mapped store of loaded results
+#
+# usage: python -m unittest discover tests
+#
+# Jonas Sukys
+# CSE Lab, ETH Zurich, Switzerland
+# sukys.jonas@gmail.com
+# All rights reserved.
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+
+import os, sys
+import shutil
+import tempfile
+import cPickle
+import unittest
+import numpy
+
+from test_incremental import create, values, SAMPLES
+
+from stats_numpy import NumPy_Stat
+
+# MC simulation with the memory-mapped store enabled
+def stored (directory):
+
+  mc = create (directory)
+  mc.config.mlmc_config.ensemble = 1
+  return mc
+
+class TestEnsemble (unittest.TestCase):
+
+  def setUp (self):
+    self.directory = tempfile.mkdtemp ()
+
+  def tearDown (self):
+    shutil.rmtree (self.directory)
+
+  # data held in the store is not pickled into the persistent cache, and restored results are views of the store
+  def test_cache (self):
+
+    mc = stored (self.directory)
+    mc.load (None)
+    mc.store ()
+
+    with open (mc.cachepath (), 'rb') as f:
+      key, cache = cPickle.load (f)
+    self.assertTrue ( all ( value is None for stamp, result in cache.values () for value in result.data.values () ) )
+
+    mc = stored (self.directory)
+    mc.load (None)
+    self.assertEqual (mc.config.solver.loads, 0)
+    for sample, result in enumerate (mc.results):
+      self.assertFalse (result ['a'] .flags.owndata)
+      self.assertTrue ( numpy.array_equal (result ['b'], values (sample, 'b')) )
+
+  # stacked data of contiguous samples are views of the store, and are used for the assembly
+  def test_stack (self):
+
+    mc = stored (self.directory)
+    mc.load (None)
+
+    stack = mc.stack ('a', range (SAMPLES))
+    self.assertFalse (stack.flags.owndata)
+    self.assertTrue ( numpy.array_equal (stack, [ values (sample, 'a') for sample in range (SAMPLES) ]) )
+    self.assertEqual (mc.stack ('a', [0, 2, 3], view=1), None)
+    self.assertEqual (mc.stack ('a', [0, 2, 3]) .shape, (3, 16))
+
+    mc.assemble ( [ NumPy_Stat ('median') ], range (SAMPLES), { 'a' : None } )
+    expected = numpy.median ( [ values (sample, 'a') for sample in range (SAMPLES) ], axis=0 )
+    self.assertTrue ( numpy.allclose (mc.stats [0] .estimate ['a'], expected) )
+
+if __name__ == '__main__':
+  unittest.main ()
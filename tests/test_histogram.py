@@ -0,0 +1,94 @@
+
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+# Tests for the online histograms with adaptive ranges
+#
+# usage: python -m unittest discover tests
+#
+# Jonas Sukys
+# CSE Lab, ETH Zurich, Switzerland
+# sukys.jonas@gmail.com
+# All rights reserved.
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+
+import os, sys
+import shutil
+import tempfile
+import unittest
+import numpy
+
+from test_incremental import create, Params, SAMPLES
+
+from stats_histogram import Online_Histogram
+
+# MC simulation with loaded results (values in [1, 2)), where the last sample has outlying values (up to 3)
+def loaded (directory, incremental):
+
+  mc = create (directory)
+  mc.params = Params ()
+  mc.params.incremental = incremental
+  mc.load ( [ 'a' ] )
+  for result in mc.results:
+    result.data ['a'] = 1 + numpy.abs (result.data ['a']) % 1
+  mc.results [-1] .data ['a'] = numpy.linspace (1, 3, 16)
+  return mc
+
+# histograms (and their sufficient statistics) of the specified samples
+def assemble (mc, indices):
+
+  mc.assemble ( [ Online_Histogram (bins=16) ], indices, { 'a' : None } )
+  stat = mc.stats [0]
+  return stat.estimate ['a'], stat.states ['a'] ['grid']
+
+class TestSeparate (unittest.TestCase):
+
+  def setUp (self):
+    self.directory = tempfile.mkdtemp ()
+
+  def tearDown (self):
+    shutil.rmtree (self.directory)
+
+  # removing samples from folded histograms yields the same estimates as an assembly of the remaining samples
+  def check (self, indices):
+
+    assemble ( loaded (self.directory, 1), range (SAMPLES) )
+    folded, grid = assemble ( loaded (self.directory, 1), indices )
+
+    scratch = tempfile.mkdtemp ()
+    try:
+      expected, expected_grid = assemble ( loaded (scratch, 0), indices )
+    finally:
+      shutil.rmtree (scratch)
+
+    self.assertEqual (grid, expected_grid)
+    self.assertTrue ( numpy.array_equal (folded, expected) )
+
+  # the adaptive range of the remaining samples is smaller (it is refitted)
+  def test_shrink (self):
+    self.check ( range (SAMPLES - 1) )
+
+  # the adaptive range of the remaining samples is the same (samples are removed from the folded estimate)
+  def test_remove (self):
+    self.check ( range (1, SAMPLES) )
+
+  def test_separable (self):
+
+    generator = numpy.random.RandomState (0)
+    samples = [ 1 + generator.rand (4) for sample in range (8) ] + [ [ 1, 2, 2.5, 3 ] ]
+
+    estimate = Online_Histogram (bins=16)
+    estimate.init ()
+    for sample in samples:
+      estimate.update (sample, None)
+
+    outlier = Online_Histogram (bins=16)
+    outlier.init ()
+    outlier.update (samples [-1], None)
+    self.assertFalse ( estimate.separable (outlier.state ()) )
+
+    regular = Online_Histogram (bins=16)
+    regular.init ()
+    regular.update (samples [0], None)
+    self.assertTrue ( estimate.separable (regular.state ()) )
+
+if __name__ == '__main__':
+  unittest.main ()
@@ -0,0 +1,258 @@
+
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+# Tests for the incremental (lazy) loading of MC results
+#
+# usage: python -m unittest discover tests
+#
+# Jonas Sukys
+# CSE Lab, ETH Zurich, Switzerland
+# sukys.jonas@gmail.com
+# All rights reserved.
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+
+import os, sys
+import imp
+import shutil
+import subprocess
+import tempfile
+import unittest
+import cStringIO
+import numpy
+
+root = os.path.join ( os.path.dirname (os.path.abspath (__file__)), '..', 'src' )
+for directory in [ '', 'lib', 'stats', 'dataclass' ]:
+  sys.path.append ( os.path.join (root, directory) )
+
+# machine configuration (see README), defaults to the configuration of a workstation
+try:
+  import local
+except ImportError:
+  local = imp.load_source ( 'local', os.path.join (root, '..', 'cfg', 'machines', 'mac.py') )
+
+from mc import MC, assemble_parallel
+from indicators import Indicators
+from dataclass_series import Series
+from stats_mean import Mean
+from stats_covariance import Covariance
+
+SAMPLES = 8
+
+# deterministic results of a sample for the specified qois
+def values (sample, qoi):
+  return numpy.random.RandomState ( [ sample, ord (qoi) ] ) .randn (16)
+
+# solver producing finished samples with fixed stamps in the specified directory, counting the loaded results
+class Solver (object):
+
+  qoi = 'a'
+
+  def __init__ (self, directory):
+    self.directory = lambda level, type : directory
+    self.loads     = 0
+
+  def stamp (self, level, type, sample):
+    return 1.0
+
+  def load (self, level, type, sample, qois):
+    self.loads += 1
+    result = Series.__new__ (Series)
+    result.meta   = { 't' : numpy.arange (16) }
+    result.data   = dict ( (qoi, values (sample, qoi)) for qoi in (qois if qois != None else [ 'a', 'b' ]) )
+    result.qois   = result.data.keys ()
+    result.dtype  = None
+    result.ranges = None
+    return result
+
+  def invalid (self, result):
+    return 0
+
+class Params (object):
+  incremental = 1
+  workers     = 1
+  verbose     = 0
+
+class Config (object):
+  pass
+
+def create (directory):
+
+  config = Config ()
+  config.level       = 0
+  config.type        = 0
+  config.samples     = range (SAMPLES)
+  config.solver      = Solver (directory)
+  config.mlmc_config = Config ()
+  config.mlmc_config.ensemble = 0
+
+  return MC (config, Params (), None, 0)
+
+def indicators (mc):
+
+  indicator = lambda result : numpy.max ( numpy.abs (result ['a']) )
+  distance  = lambda f, c : indicator (f)
+  result = Indicators ( indicator, distance, [0], [ (0, 0) ], [ [0, None] ], 0, 1, None, None, 0, qois = [ 'a' ] )
+  result.L0 = 0
+  return result
+
+# first session: load all results and keep the indicator values
+def first (directory):
+
+  mc = create (directory)
+  mc.recall ( [ 'a' ] )
+  loaded = mc.load ( [ 'a' ] )
+  mc.store ()
+  indicators (mc) .values ( [ mc ], [ loaded ] )
+
+# second session: lazy load, then require all qois and assemble
+def second (directory):
+
+  mc = create (directory)
+  mc.recall ( [ 'a' ] )
+  loaded = mc.load ( [ 'a' ], lazy=1 )
+  deferred = mc.config.solver.loads
+
+  mc.require ( [ 'a', 'b' ] )
+  mc.assemble ( [ Mean () ], loaded, { 'a' : None, 'b' : None } )
+
+  estimate = mc.stats [0] .estimate
+  print 'RESULT', deferred, len (loaded), repr ( [ list (estimate ['a']), list (estimate ['b']) ] )
+
+class TestLazyLoading (unittest.TestCase):
+
+  def setUp (self):
+    self.directory = tempfile.mkdtemp ()
+
+  def tearDown (self):
+    shutil.rmtree (self.directory)
+
+  def test_lazy_load_require_assemble (self):
+
+    first (self.directory)
+
+    # the second session runs in a fresh process
+    script = 'import sys; sys.path.insert (0, %r); import test_incremental; test_incremental.second (%r)' % ( os.path.dirname (os.path.abspath (__file__)), self.directory )
+    output = subprocess.check_output ( [ sys.executable, '-c', script ] )
+    line = [ line for line in output.splitlines () if line.startswith ('RESULT') ] [0]
+    deferred, count, estimates = line.split (' ', 3) [1:]
+
+    # all results were deferred by the lazy load
+    self.assertEqual (int (deferred), 0)
+    self.assertEqual (int (count), SAMPLES)
+
+    # deferred results were loaded for the assembly
+    expected = [ numpy.mean ( [ values (sample, qoi) for sample in range (SAMPLES) ], axis=0 ) for qoi in [ 'a', 'b' ] ]
+    self.assertTrue ( numpy.allclose ( eval (estimates), expected ) )
+
+  def test_store_keeps_deferred (self):
+
+    first (self.directory)
+
+    mc = create (self.directory)
+    mc.recall ( [ 'a' ] )
+    mc.load ( [ 'a' ], lazy=1 )
+
+    # a changed cache does not lose the entries of the deferred results
+    mc.changed = 1
+    mc.store ()
+    self.assertEqual ( len (mc.cached () [1]), SAMPLES )
+
+class TestProjection (unittest.TestCase):
+
+  def setUp (self):
+    self.directory = tempfile.mkdtemp ()
+
+  def tearDown (self):
+    shutil.rmtree (self.directory)
+
+  # results of a projected load are not restored from the persistent cache if more qois are needed
+  def test_cache (self):
+
+    first (self.directory)
+
+    mc = create (self.directory)
+    mc.load ( [ 'a' ] )
+    self.assertEqual (mc.config.solver.loads, 0)
+
+    mc = create (self.directory)
+    mc.load (None)
+    mc.store ()
+    self.assertEqual (mc.config.solver.loads, SAMPLES)
+    self.assertTrue ( all ( 'b' in result.data for result in mc.results ) )
+
+    # results of all qois cover any projection
+    mc = create (self.directory)
+    mc.load ( [ 'b' ] )
+    self.assertEqual (mc.config.solver.loads, 0)
+
+  # results are checked again when additional qois are required (NaN values are invalid)
+  def test_invalid (self):
+
+    mc = create (self.directory)
+    mc.load ( [ 'a' ] )
+
+    load = mc.config.solver.load
+    def corrupted (level, type, sample, qois):
+      result = load (level, type, sample, qois)
+      if sample == 3 and 'b' in result.data:
+        result.data ['b'] [0] = float ('nan')
+      return result
+    mc.config.solver.load = corrupted
+
+    self.assertEqual (mc.require ( [ 'a', 'b' ] ), [3])
+    self.assertEqual (mc.stamps [3], None)
+
+class TestFolds (unittest.TestCase):
+
+  def setUp (self):
+    self.directory = tempfile.mkdtemp ()
+
+  def tearDown (self):
+    shutil.rmtree (self.directory)
+
+  # states are kept only for statistics which are folded (statistics with a specialized evaluation are not)
+  def test_record (self):
+
+    mc = create (self.directory)
+    loaded = mc.load (None)
+    stats = [ Mean (), Covariance ( [ 'a', 'b' ] ) ]
+    mc.assemble (stats, loaded, { 'a' : None, 'b' : None })
+
+    folds = mc.unfold ()
+    self.assertTrue  ( mc.foldkeys [0] in folds )
+    self.assertFalse ( mc.foldkeys [1] in folds )
+
+class TestParallel (unittest.TestCase):
+
+  def setUp (self):
+    self.directory = tempfile.mkdtemp ()
+
+  def tearDown (self):
+    shutil.rmtree (self.directory)
+
+  # output of the assembling workers is printed by the parent process
+  def test_output (self):
+
+    mcs = []
+    for position in range (2):
+      directory = os.path.join (self.directory, str (position))
+      os.mkdir (directory)
+      mcs.append ( create (directory) )
+      mcs [-1] .load (None)
+
+    stdout = sys.stdout
+    sys.stdout = cStringIO.StringIO ()
+    try:
+      assemble_parallel ( mcs, [ Mean () ], { 'a' : None }, [ (0, range (SAMPLES)), (1, range (SAMPLES)) ], 2 )
+      output = sys.stdout.getvalue ()
+    finally:
+      sys.stdout = stdout
+
+    self.assertEqual ( output.count ('-> level 0, type 0'), 2 )
+    self.assertEqual ( output.count ('Progress: [####################] 100%'), 2 )
+
+    expected = numpy.mean ( [ values (sample, 'a') for sample in range (SAMPLES) ], axis=0 )
+    for mc in mcs:
+      self.assertTrue ( numpy.allclose (mc.stats [0] .estimate ['a'], expected) )
+
+if __name__ == '__main__':
+  unittest.main ()
@@ -0,0 +1,109 @@
+
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+# Tests for the online percentiles
+#
+# usage: python -m unittest discover tests
+#
+# Jonas Sukys
+# CSE Lab, ETH Zurich, Switzerland
+# sukys.jonas@gmail.com
+# All rights reserved.
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+
+import os, sys
+import unittest
+import numpy
+
+root = os.path.join ( os.path.dirname (os.path.abspath (__file__)), '..', 'src' )
+for directory in [ '', 'lib', 'stats', 'dataclass' ]:
+  sys.path.append ( os.path.join (root, directory) )
+
+from stats_percentile import Percentile
+
+# online estimate of the percentiles of the specified samples
+def estimate (percentiles, samples, **kwargs):
+
+  stat = Percentile (percentiles, **kwargs)
+  stat.init ()
+  for sample in samples:
+    stat.update (sample, None)
+  return stat.result ()
+
+# reference (scalar) P-square estimate of a percentile p (in [0, 1]) of the specified values (Jain & Chlamtac, 1985)
+def reference (values, p):
+
+  q = sorted (values [:5])
+  n = [ 0, 1, 2, 3, 4 ]
+  desired    = [ 0, 2 * p, 4 * p, 2 + 2 * p, 4 ]
+  increments = [ 0, p / 2, p, (1 + p) / 2, 1 ]
+
+  for value in values [5:]:
+
+    if value < q [0]:
+      q [0] = value
+      k = 0
+    elif value >= q [4]:
+      q [4] = value
+      k = 3
+    else:
+      k = max ( [ i for i in range (4) if q [i] <= value ] )
+
+    for i in range (k + 1, 5):
+      n [i] += 1
+    desired = [ d + increment for d, increment in zip (desired, increments) ]
+
+    for i in [1, 2, 3]:
+      deviation = desired [i] - n [i]
+      if (deviation >= 1 and n [i + 1] - n [i] > 1) or (deviation <= -1 and n [i - 1] - n [i] < -1):
+        d = 1 if deviation > 0 else -1
+        height = q [i] + d / float (n [i + 1] - n [i - 1]) * ( (n [i] - n [i - 1] + d) * (q [i + 1] - q [i]) / (n [i + 1] - n [i])
+                                                              + (n [i + 1] - n [i] - d) * (q [i] - q [i - 1]) / (n [i] - n [i - 1]) )
+        if not q [i - 1] < height < q [i + 1]:
+          height = q [i] + d * (q [i + d] - q [i]) / (n [i + d] - n [i])
+        q [i] = height
+        n [i] += d
+
+  return q [2]
+
+class TestPercentile (unittest.TestCase):
+
+  # percentiles of the first (buffered) samples are exact, also at the initialization of the markers
+  def test_exact (self):
+
+    generator = numpy.random.RandomState (0)
+    for exact in [ 5, 20 ]:
+      for count in [ 1, 2, 4, 5, exact ]:
+        samples = generator.randn (count, 3)
+        expected = numpy.percentile (samples, [5, 95], axis=0) .T
+        self.assertTrue ( numpy.allclose ( estimate ( [5, 95], samples, exact=exact ), expected ) )
+
+  # markers carry the information of all (buffered) samples: percentiles are not collapsed to the median
+  def test_markers (self):
+
+    samples = numpy.random.RandomState (1) .randn (6, 3)
+    result  = estimate ( [5, 95], samples, exact=5 )
+    self.assertTrue ( numpy.all (result [:, 0] < result [:, 1]) )
+
+  # percentiles of skewed data for many elements (the markers are not squeezed towards the extremes)
+  def test_skewed (self):
+
+    samples  = numpy.random.RandomState (3) .lognormal (0, 0.5, (2000, 500))
+    expected = numpy.percentile (samples, 95, axis=0)
+
+    for exact in [ 5, 20 ]:
+      result = estimate ( [95], samples, exact=exact )
+      errors = numpy.abs (result - expected)
+      self.assertTrue ( numpy.mean (errors) < 0.05 )
+      self.assertTrue ( numpy.max  (errors) < 0.6 )
+
+      # the same estimates as the scalar P-square algorithm, independently of the number of kept samples
+      self.assertTrue ( numpy.allclose ( result [:20], [ reference (list (samples [:, element]), 0.95) for element in range (20) ] ) )
+
+  def test_convergence (self):
+
+    samples  = numpy.random.RandomState (2) .randn (20000, 2)
+    expected = numpy.percentile (samples, [5, 50, 95], axis=0) .T
+    self.assertTrue ( numpy.allclose ( estimate ( [5, 50, 95], samples ), expected, atol=0.05 ) )
+
+if __name__ == '__main__':
+  unittest.main ()
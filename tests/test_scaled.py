@@ -0,0 +1,64 @@
+
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+# Tests for the lazy scaled views of data classes
+#
+# usage: python -m unittest discover tests
+#
+# Jonas Sukys
+# CSE Lab, ETH Zurich, Switzerland
+# sukys.jonas@gmail.com
+# All rights reserved.
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+
+import os, sys
+import unittest
+import numpy
+
+root = os.path.join ( os.path.dirname (os.path.abspath (__file__)), '..', 'src' )
+for directory in [ '', 'lib', 'stats', 'dataclass' ]:
+  sys.path.append ( os.path.join (root, directory) )
+
+from dataclass_series import Series
+from dataclass_scaled import Scaled
+
+# series with random data for the specified qois
+def series (seed, qois=[ 'p', 'q' ]):
+
+  generator = numpy.random.RandomState (seed)
+  result = Series (qois=qois)
+  result.meta = { 't' : numpy.arange (10) }
+  result.data = dict ( (qoi, generator.randn (10)) for qoi in qois )
+  return result
+
+class TestScaled (unittest.TestCase):
+
+  # meta data and methods not involving the data do not materialize the view
+  def test_metadata (self):
+
+    base = series (0)
+    view = 2.0 * base
+
+    self.assertTrue (isinstance (view, Scaled))
+    self.assertTrue (view.meta is base.meta)
+    self.assertEqual (view.qois, base.qois)
+    self.assertEqual (view.params (), base.params ())
+    self.assertEqual (view.like () ['p'] .shape, (10, ))
+    self.assertFalse (view.owned)
+    self.assertTrue ( numpy.allclose (view ['p'], 2 * base ['p']) )
+
+  # methods reading or modifying the data are applied to a scaled copy, leaving the base unchanged
+  def test_data (self):
+
+    base = series (1)
+    data = dict ( (qoi, values.copy ()) for qoi, values in base.data.iteritems () )
+    view = 2.0 * base
+
+    self.assertTrue ( numpy.allclose (view.serialize ('q'), 2 * data ['q']) )
+    self.assertTrue (view.owned)
+
+    view -= base
+    self.assertTrue ( numpy.allclose (view ['p'], data ['p']) )
+    self.assertTrue ( all ( numpy.array_equal (base.data [qoi], data [qoi]) for qoi in data ) )
+
+if __name__ == '__main__':
+  unittest.main ()
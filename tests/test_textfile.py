@@ -0,0 +1,68 @@
+
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+# Tests for the fast reader of whitespace-delimited numeric text files
+#
+# usage: python -m unittest discover tests
+#
+# Jonas Sukys
+# CSE Lab, ETH Zurich, Switzerland
+# sukys.jonas@gmail.com
+# All rights reserved.
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+
+import os, sys
+import shutil
+import tempfile
+import unittest
+import numpy
+
+sys.path.append ( os.path.join ( os.path.dirname (os.path.abspath (__file__)), '..', 'src', 'lib' ) )
+
+import textfile
+
+class TestRead (unittest.TestCase):
+
+  def setUp (self):
+    self.directory = tempfile.mkdtemp ()
+
+  def tearDown (self):
+    shutil.rmtree (self.directory)
+
+  # read the specified text (after a header line) using the fast reader
+  def read (self, body, columns=None):
+    path = os.path.join (self.directory, 'statistics.dat')
+    with open (path, 'w') as f:
+      f.write ('step t p\n' + body)
+    return textfile.read (path, columns)
+
+  def test_complete (self):
+    names, data = self.read ('1 0.1 3\n2 0.2 5\n')
+    self.assertEqual (names, [ 'step', 't', 'p' ])
+    self.assertTrue ( numpy.array_equal (data, [ [1, 0.1, 3], [2, 0.2, 5] ]) )
+
+  def test_columns (self):
+    names, data = self.read ('1 0.1 3\n2 0.2 5\n', [ 'p', 'x', 'step' ])
+    self.assertEqual (names, [ 'p', 'step' ])
+    self.assertTrue ( numpy.array_equal (data, [ [3, 1], [5, 2] ]) )
+
+  # the last row of a file which is still being written is skipped
+  def test_incomplete (self):
+    names, data = self.read ('1 0.1 3\n2 0.2 5\n3 0.')
+    self.assertTrue ( numpy.array_equal (data, [ [1, 0.1, 3], [2, 0.2, 5] ]) )
+
+  # rows with extra entries are skipped without shifting the columns of the remaining rows
+  def test_ragged (self):
+    names, data = self.read ('1 0.1 3\n2 0.2 5 6')
+    self.assertTrue ( numpy.array_equal (data, [ [1, 0.1, 3] ]) )
+    names, data = self.read ('1 0.1 3 4\n2 0.2\n3 0.3 7\n')
+    self.assertTrue ( numpy.array_equal (data, [ [3, 0.3, 7] ]) )
+
+  # entries which are not numeric are not silently dropped together with their rows
+  def test_non_numeric (self):
+    names, data = self.read ('1 0.1 3\n2 0.2 x\n')
+    self.assertEqual (data.shape, (2, 3))
+    self.assertTrue ( numpy.array_equal (data [0], [1, 0.1, 3]) )
+    self.assertTrue ( numpy.array_equal (data [1, :2], [2, 0.2]) and numpy.isnan (data [1, 2]) )
+
+if __name__ == '__main__':
+  unittest.main ()